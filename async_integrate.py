@@ -0,0 +1,185 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+
+from integrate import IntegrateOrders
+
+class AsyncIntegrateOrders:
+    """
+    asyncio counterpart of integrate.IntegrateOrders.
+
+    Shares credentials, headers, timeouts and retry policy with the given
+    ConnectToIntegrate and keeps one httpx connection pool for all calls,
+    so independent endpoints can be awaited together:
+
+        async with AsyncIntegrateOrders(conn) as aio:
+            holdings, positions, orders = await asyncio.gather(
+                aio.holdings(), aio.positions(), aio.orders()
+            )
+
+    The pool is bound to the running event loop; create one client per loop.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        connect_timeout, read_timeout = conn.timeout
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=conn.pool_size, max_keepalive_connections=conn.pool_size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def request(self, method, url, retry=False, stream=False, **kwargs):
+        """
+        With stream=True the body is not read; the caller must aclose() the
+        response (history_stream does).
+        """
+        kwargs.setdefault("headers", self.conn.headers)
+        attempts = self.conn.max_retries + 1 if retry else 1
+        group = self.conn.endpoint_group(url)
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            # The limiter blocks; wait for it on a worker thread so the event loop keeps running
+            await asyncio.to_thread(self.conn.limiter.acquire, group)
+            try:
+                resp = await self.client.send(self.client.build_request(method, url, **kwargs), stream=stream)
+            except httpx.TransportError:
+                if last:
+                    raise
+            else:
+                if last or resp.status_code not in self.conn.RETRY_STATUSES:
+                    return resp
+                await resp.aclose()
+            await asyncio.sleep(self.conn.backoff * (2 ** attempt))
+
+    async def _get(self, path, retry=True):
+        resp = await self.request("GET", f"{self.conn.BASE_URL}{path}", retry=retry)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def _post(self, path, data, headers=None):
+        kwargs = {"json": data}
+        if headers:
+            kwargs["headers"] = headers
+        resp = await self.request("POST", f"{self.conn.BASE_URL}{path}", **kwargs)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def holdings(self):
+        return await self._get("/holdings")
+
+    async def positions(self):
+        return await self._get("/positions")
+
+    async def orders(self):
+        return await self._get("/orders")
+
+    async def gtt_orders(self):
+        return await self._get("/gttorders")
+
+    async def trade_book(self):
+        return await self._get("/trades")
+
+    async def quotes(self, exchange, token):
+        return await self._get(f"/quotes/{exchange}/{token}")
+
+    async def history(self, segment, token, timeframe, from_time, to_time):
+        url = f"{self.conn.DATA_URL}/history/{segment}/{token}/{timeframe}/{from_time}/{to_time}"
+        resp = await self.request("GET", url, headers={"Authorization": self.conn.api_session_key}, retry=True)
+        resp.raise_for_status()
+        return resp.text
+
+    @asynccontextmanager
+    async def history_stream(self, segment, token, timeframe, from_time, to_time):
+        """
+        Like history(), but yields the open streaming response so the body
+        can be consumed as it arrives (resp.aiter_bytes()); the connection
+        goes back to the pool when the block exits.
+        """
+        url = f"{self.conn.DATA_URL}/history/{segment}/{token}/{timeframe}/{from_time}/{to_time}"
+        resp = await self.request("GET", url, headers={"Authorization": self.conn.api_session_key}, retry=True, stream=True)
+        try:
+            resp.raise_for_status()
+            yield resp
+        finally:
+            await resp.aclose()
+
+    _optional = staticmethod(IntegrateOrders._optional)
+
+    async def place_order(self, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity,
+                          validity=None, disclosed_quantity=None, remarks=None, trigger_price=None):
+        data = {
+            "tradingsymbol": tradingsymbol,
+            "exchange": exchange,
+            "order_type": order_type,
+            "price": price,
+            "price_type": price_type,
+            "product_type": product_type,
+            "quantity": quantity,
+        }
+        self._optional(data, validity=validity, disclosed_quantity=disclosed_quantity, remarks=remarks, trigger_price=trigger_price)
+        return await self._post("/placeorder", data)
+
+    async def modify_order(self, order_id, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity,
+                           validity=None, disclosed_quantity=None, remarks=None, trigger_price=None):
+        data = {
+            "order_id": order_id,
+            "tradingsymbol": tradingsymbol,
+            "exchange": exchange,
+            "order_type": order_type,
+            "price": price,
+            "price_type": price_type,
+            "product_type": product_type,
+            "quantity": quantity,
+        }
+        self._optional(data, validity=validity, disclosed_quantity=disclosed_quantity, remarks=remarks, trigger_price=trigger_price)
+        return await self._post("/modify", data)
+
+    async def place_gtt_order(self, tradingsymbol, exchange, order_type, quantity, alert_price, price, condition):
+        data = {
+            "tradingsymbol": tradingsymbol,
+            "exchange": exchange,
+            "order_type": order_type,
+            "quantity": quantity,
+            "alert_price": alert_price,
+            "price": price,
+            "condition": condition,
+        }
+        return await self._post("/gttplace", data)
+
+    async def place_oco_order(self, tradingsymbol, exchange, order_type, target_quantity, stoploss_quantity, target_price, stoploss_price, remarks):
+        data = {
+            "tradingsymbol": tradingsymbol,
+            "exchange": exchange,
+            "order_type": order_type,
+            "target_quantity": target_quantity,
+            "stoploss_quantity": stoploss_quantity,
+            "target_price": target_price,
+            "stoploss_price": stoploss_price,
+            "remarks": remarks,
+        }
+        return await self._post("/ocoplace", data)
+
+    async def cancel_order(self, order_id):
+        return await self._get(f"/cancel/{order_id}", retry=False)
+
+    async def modify_gtt_order(self, data):
+        return await self._post("/gttmodify", data, headers={**self.conn.headers, "Content-Type": "application/json"})
+
+    async def modify_oco_order(self, data):
+        return await self._post("/ocomodify", data, headers={**self.conn.headers, "Content-Type": "application/json"})
+
+    async def cancel_gtt_order(self, alert_id):
+        return await self._get(f"/gttcancel/{alert_id}", retry=False)
+
+    async def cancel_oco_order(self, alert_id):
+        return await self._get(f"/ococancel/{alert_id}", retry=False)
@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from close_cache import DEFAULT_CACHE_DIR
+from history_parser import parse_history
+from trading_calendar import IST, default_calendar
+
+BAR_COLUMNS = ["time", "open", "high", "low", "close", "volume"]
+
+# Widest date range asked of the history service in one request. The
+# limits are not published; minute bars are kept to a month per call.
+MAX_SPAN_DAYS = {"day": 3650, "minute": 30}
+
+def bar_rows(history):
+    """Rows of (iso minute time, open, high, low, close, volume) from history_parser.parse_history arrays."""
+    times = np.datetime_as_string(history["time"], unit="m").tolist()
+    return list(zip(times, *(history[c].tolist() for c in BAR_COLUMNS[1:])))
+
+def _merge(ranges):
+    # Merge overlapping or touching [start, end] day ranges
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _chunks(start, end, span):
+    while start <= end:
+        stop = min(end, start + timedelta(days=span - 1))
+        yield start, stop
+        start = stop + timedelta(days=1)
+
+class BarStore:
+    """
+    On-disk OHLCV bars keyed by (segment, token, timeframe, time), next to
+    the close cache.
+
+    Alongside the bars it records which calendar-day ranges have been
+    fetched in full, so fetch() asks the history service only for the
+    missing gaps and serves everything else from disk. Only days up to
+    the last completed session are recorded as covered; today's bars are
+    stored but refetched until the session closes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "bars.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self.requests = 0
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS bars ("
+                "segment TEXT, token TEXT, timeframe TEXT, time TEXT, "
+                "open REAL, high REAL, low REAL, close REAL, volume REAL, "
+                "PRIMARY KEY (segment, token, timeframe, time)) WITHOUT ROWID"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS coverage ("
+                "segment TEXT, token TEXT, timeframe TEXT, start TEXT, end TEXT)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS coverage_key ON coverage (segment, token, timeframe)"
+            )
+
+    def coverage(self, segment, token, timeframe):
+        """Merged [start, end] day ranges already fetched in full."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT start, end FROM coverage WHERE segment=? AND token=? AND timeframe=?",
+                (segment, str(token), timeframe),
+            ).fetchall()
+        return _merge((date.fromisoformat(s), date.fromisoformat(e)) for s, e in rows)
+
+    def missing(self, segment, token, timeframe, start, end):
+        """The [start, end] day ranges within start..end that are not covered yet."""
+        gaps = []
+        cursor = start
+        for cov_start, cov_end in self.coverage(segment, token, timeframe):
+            if cov_end < cursor:
+                continue
+            if cov_start > end:
+                break
+            if cov_start > cursor:
+                gaps.append((cursor, cov_start - timedelta(days=1)))
+            cursor = max(cursor, cov_end + timedelta(days=1))
+        if cursor <= end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def store(self, segment, token, timeframe, rows, covered=None):
+        """
+        Insert bar_rows() rows; `covered` is a (start, end) day range the
+        rows are the complete answer for.
+        """
+        key = (segment, str(token), timeframe)
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [key + row for row in rows],
+            )
+            if covered is None:
+                return
+            existing = self._db.execute(
+                "SELECT start, end FROM coverage WHERE segment=? AND token=? AND timeframe=?", key
+            ).fetchall()
+            ranges = [(date.fromisoformat(s), date.fromisoformat(e)) for s, e in existing] + [covered]
+            self._db.execute("DELETE FROM coverage WHERE segment=? AND token=? AND timeframe=?", key)
+            self._db.executemany(
+                "INSERT INTO coverage VALUES (?, ?, ?, ?, ?)",
+                [key + (s.isoformat(), e.isoformat()) for s, e in _merge(ranges)],
+            )
+
+    def bars(self, segment, token, timeframe, start, end):
+        """Stored bars from the start of `start` to the end of `end` as a DataFrame of BAR_COLUMNS."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT time, open, high, low, close, volume FROM bars "
+                "WHERE segment=? AND token=? AND timeframe=? AND time >= ? AND time < ? ORDER BY time",
+                (segment, str(token), timeframe, start.isoformat(), (end + timedelta(days=1)).isoformat()),
+            ).fetchall()
+        frame = pd.DataFrame(rows, columns=BAR_COLUMNS)
+        frame["time"] = pd.to_datetime(frame["time"])
+        return frame
+
+    def fetch(self, io, segment, token, timeframe, start, end, calendar=None):
+        """
+        Bars for start..end (dates, inclusive), requesting only the day
+        ranges not on disk yet. Returns the same frame as bars().
+        """
+        calendar = calendar or default_calendar()
+        # Today is the exchange's date, not the host's (a UTC host is a day behind after 18:30)
+        end = min(end, datetime.now(IST).date())
+        complete_through = calendar.last_completed_session(exchange=segment)
+        for gap_start, gap_end in self.missing(segment, token, timeframe, start, end):
+            for chunk_start, chunk_end in _chunks(gap_start, gap_end, MAX_SPAN_DAYS.get(timeframe, 30)):
+                resp = io.history_stream(
+                    segment, token, timeframe,
+                    chunk_start.strftime("%d%m%Y") + "0000", chunk_end.strftime("%d%m%Y") + "2359",
+                )
+                with self._lock:
+                    self.requests += 1
+                with resp:
+                    history = parse_history(resp.raw)
+                covered = (chunk_start, min(chunk_end, complete_through)) if chunk_start <= complete_through else None
+                self.store(segment, token, timeframe, bar_rows(history), covered)
+        return self.bars(segment, token, timeframe, start, end)
+
+    def fetch_many(self, io, instruments, timeframe, start, end, calendar=None, max_workers=None):
+        """fetch() for many (segment, token) pairs concurrently; returns {(segment, token): frame}."""
+        targets = list(dict.fromkeys((str(seg), str(tok)) for seg, tok in instruments))
+        if not targets:
+            return {}
+        workers = max(1, min(max_workers or io.conn.pool_size, len(targets)))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            frames = pool.map(lambda t: self.fetch(io, t[0], t[1], timeframe, start, end, calendar), targets)
+            return dict(zip(targets, frames))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
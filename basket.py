@@ -0,0 +1,340 @@
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from order_book import PENDING_STATUSES, LocalOrderBook
+
+def flatten_holdings(raw_holdings):
+    flat = []
+    for h in raw_holdings:
+        ts_list = h.get("tradingsymbol", [])
+        for ts in ts_list:
+            if ts.get("exchange") == "NSE":
+                flat.append({
+                    "tradingsymbol": ts.get("tradingsymbol"),
+                    "exchange": ts.get("exchange"),
+                    "isin": ts.get("isin"),
+                    "dp_qty": h.get("dp_qty"),
+                    "avg_buy_price": h.get("avg_buy_price"),
+                    "haircut": h.get("haircut"),
+                    "t1_qty": h.get("t1_qty"),
+                    "holding_used": h.get("holding_used"),
+                    "token": ts.get("token", "-"),
+                })
+    return flat
+
+def flatten_positions(raw_positions):
+    flat = []
+    for p in raw_positions:
+        flat.append({
+            "tradingsymbol": p.get("tradingsymbol"),
+            "exchange": p.get("exchange"),
+            "product_type": p.get("product_type"),
+            "net_quantity": p.get("net_quantity"),
+            "net_averageprice": p.get("net_averageprice"),
+            "realized_pnl": p.get("realized_pnl"),
+            "unrealized_pnl": p.get("unrealized_pnl"),
+            "token": p.get("token", "-"),
+        })
+    return flat
+
+def resolve_shortcuts(order_params):
+    # Convert CLI style short codes to API expected values
+    exg = str(order_params['exchange']).strip().upper()
+    if exg in ("N", "NSE"):
+        order_params['exchange'] = "NSE"
+    elif exg in ("B", "BSE"):
+        order_params['exchange'] = "BSE"
+
+    ot = str(order_params['order_type']).strip().upper()
+    if ot in ("B", "BUY"):
+        order_params['order_type'] = "BUY"
+    elif ot in ("S", "SELL"):
+        order_params['order_type'] = "SELL"
+
+    pt = str(order_params['price_type']).strip().upper()
+    if pt in ("L", "LIMIT"):
+        order_params['price_type'] = "LIMIT"
+    elif pt in ("M", "MARKET"):
+        order_params['price_type'] = "MARKET"
+
+    val = str(order_params.get('validity', "")).strip().upper()
+    if val in ("D", "DAY"):
+        order_params['validity'] = "DAY"
+    elif val in ("I", "IOC"):
+        order_params['validity'] = "IOC"
+    return order_params
+
+def _quantity(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def order_payload(tradingsymbol, exchange, side, quantity, product_type, price_type="MARKET", price=None, remarks=""):
+    """A /placeorder payload in the shape the Exit page sends, normalised with resolve_shortcuts."""
+    limit = str(price_type).upper().startswith("L")
+    return resolve_shortcuts({
+        "tradingsymbol": str(tradingsymbol),
+        "exchange": exchange,
+        "order_type": side,
+        "quantity": int(quantity),
+        "product_type": product_type,
+        "price_type": price_type,
+        "validity": "DAY",
+        "disclosed_quantity": "0",
+        "price": str(price) if limit else "0",
+        "remarks": remarks,
+    })
+
+def holdings_exit_payloads(holdings, price_type="MARKET", price_for=None, remarks=""):
+    """
+    SELL payloads for flatten_holdings rows, one per row with a positive DP
+    quantity. For LIMIT orders price_for(row) supplies the price; rows it
+    cannot price are skipped.
+    """
+    payloads = []
+    for row in holdings:
+        qty = _quantity(row.get("dp_qty"))
+        if qty <= 0:
+            continue
+        price = price_for(row) if price_for and str(price_type).upper().startswith("L") else None
+        if str(price_type).upper().startswith("L") and price in (None, "", "-"):
+            continue
+        payloads.append(order_payload(row["tradingsymbol"], "NSE", "SELL", qty, "CNC", price_type, price, remarks))
+    return payloads
+
+def positions_exit_payloads(positions, price_type="MARKET", price_for=None, remarks=""):
+    """
+    Payloads that flatten flatten_positions rows: SELL a long net quantity,
+    BUY back a short one, in the position's own product type. Flat rows
+    are skipped, as are LIMIT rows price_for(row) cannot price.
+    """
+    payloads = []
+    for row in positions:
+        net = _quantity(row.get("net_quantity"))
+        if net == 0:
+            continue
+        price = price_for(row) if price_for and str(price_type).upper().startswith("L") else None
+        if str(price_type).upper().startswith("L") and price in (None, "", "-"):
+            continue
+        payloads.append(order_payload(
+            row["tradingsymbol"], row.get("exchange") or "NSE", "SELL" if net > 0 else "BUY",
+            abs(net), row.get("product_type"), price_type, price, remarks,
+        ))
+    return payloads
+
+def _place(io, payload):
+    start = time.perf_counter()
+    result = {
+        "tradingsymbol": payload["tradingsymbol"],
+        "exchange": payload["exchange"],
+        "side": payload["order_type"],
+        "quantity": payload["quantity"],
+        "price_type": payload["price_type"],
+        "price": payload["price"],
+    }
+    try:
+        body = io.place_order(**payload)
+        body = body if isinstance(body, dict) else {}
+        placed = bool(body.get("order_id")) or str(body.get("status", "")).upper() == "SUCCESS"
+        result.update(
+            status="placed" if placed else "failed",
+            order_id=body.get("order_id", ""),
+            message=body.get("message") or body.get("status") or "",
+        )
+    except Exception as e:
+        result.update(status="failed", order_id="", message=str(e))
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000)
+    return result
+
+def _run_all(io, fn, items, max_workers=None):
+    # One call per item on the connection pool; requests pass through the
+    # connection's rate limiter, so the pool can be wide without tripping
+    # broker limits. Each call goes through io, which invalidates the books.
+    if not items:
+        return []
+    workers = max(1, min(max_workers or io.conn.pool_size, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(fn, items))
+
+def place_basket(io, payloads, max_workers=None):
+    """
+    Place every payload concurrently and return one result dict per payload,
+    in input order: the order fields plus status ("placed"/"failed"),
+    order_id, the broker's message and latency_ms. A failing order never
+    stops the rest.
+    """
+    return _run_all(io, lambda p: _place(io, p), payloads, max_workers)
+
+# --- Pending orders ---
+def filter_pending_orders(order_book):
+    """Working orders with quantity left, from an /orders row list or an order_book.LocalOrderBook."""
+    if isinstance(order_book, LocalOrderBook):
+        return order_book.pending()
+    filtered = [
+        o for o in order_book
+        if o.get("order_status") in PENDING_STATUSES and int(float(o.get("pending_qty", 0))) > 0
+    ]
+    return filtered
+
+def modify_payload(order, new_price, new_qty, new_trigger_price=None):
+    """A /modify payload that keeps every field of `order` except price, quantity and trigger."""
+    payload = {
+        "exchange": order.get("exchange"),
+        "order_id": order.get("order_id"),
+        "tradingsymbol": order.get("tradingsymbol"),
+        "quantity": str(new_qty),
+        "price": str(new_price),
+        "product_type": order.get("product_type"),
+        "order_type": order.get("order_type"),
+        "price_type": order.get("price_type"),
+        "validity": order.get("validity"),
+        "disclosed_quantity": order.get("disclosed_quantity") or "0",
+        "remarks": order.get("remarks") or "",
+    }
+    if new_trigger_price is not None:
+        payload["trigger_price"] = str(new_trigger_price)
+    return payload
+
+def modify_order(io, order, new_price, new_qty, new_trigger_price=None):
+    return io.modify_order(**modify_payload(order, new_price, new_qty, new_trigger_price))
+
+def round_to_tick(price, tick):
+    return round(round(price / tick) * tick, 4)
+
+def _row(order, action, **fields):
+    return {
+        "order_id": order.get("order_id"),
+        "tradingsymbol": order.get("tradingsymbol"),
+        "side": order.get("order_type"),
+        "action": action,
+        "old_price": order.get("price"),
+        **fields,
+    }
+
+def _outcome(order, action, call, **fields):
+    result = _row(order, action, **fields)
+    start = time.perf_counter()
+    try:
+        body = call()
+        body = body if isinstance(body, dict) else {}
+        status = str(body.get("status", "")).upper()
+        ok = bool(body.get("order_id")) or status == "SUCCESS"
+        result.update(status="done" if ok else "failed", message=body.get("message") or status)
+    except Exception as e:
+        result.update(status="failed", message=str(e))
+    result["latency_ms"] = round((time.perf_counter() - start) * 1000)
+    return result
+
+def cancel_orders(io, orders, max_workers=None):
+    """Cancel every order concurrently; one outcome row per order, in input order."""
+    return _run_all(io, lambda o: _outcome(o, "cancel", lambda: io.cancel_order(o.get("order_id"))), orders, max_workers)
+
+def reprice_orders(io, orders, ticks, ltp_for, tick_for=None, max_workers=None):
+    """
+    Modify LIMIT orders concurrently to LTP shifted by `ticks` tick sizes
+    towards the other side: a BUY moves to LTP + ticks, a SELL to
+    LTP - ticks, so positive ticks chase the market and negative ticks
+    rest behind it. ltp_for(order) gives the LTP and tick_for(order) the
+    tick size (0.05 when unknown). Orders that are not LIMIT, or have no
+    LTP, are reported as skipped.
+    """
+    def reprice(order):
+        if str(order.get("price_type", "")).upper() != "LIMIT":
+            return _row(order, "reprice", new_price=None, status="skipped", message="not a LIMIT order")
+        try:
+            ltp = float(ltp_for(order))
+        except (TypeError, ValueError):
+            return _row(order, "reprice", new_price=None, status="skipped", message="no LTP")
+        tick = (tick_for(order) if tick_for else None) or 0.05
+        direction = 1 if str(order.get("order_type", "")).upper() == "BUY" else -1
+        price = round_to_tick(ltp + direction * ticks * tick, tick)
+        payload = modify_payload(order, price, order.get("quantity"))
+        return _outcome(order, "reprice", lambda: io.modify_order(**payload), new_price=price)
+    return _run_all(io, reprice, orders, max_workers)
+
+# --- Basket buy ---
+def parse_basket(text):
+    """
+    Parse basket lines of "SYMBOL value" (comma, tab or space separated) into
+    ([(symbol, value, percent)], [bad lines]). `percent` is True for a value
+    written with a trailing %, which can only be a weight; the caller decides
+    whether bare numbers are weights or rupee amounts (see check_basket).
+    Blank lines and # comments are ignored.
+    """
+    entries, bad = [], []
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line:
+            continue
+        parts = [p for p in re.split(r"[,\t ]+", line) if p]
+        try:
+            value = float(parts[1].rstrip("%").replace("_", ""))
+        except (IndexError, ValueError):
+            bad.append(line)
+            continue
+        if len(parts) != 2 or value <= 0:
+            bad.append(line)
+            continue
+        entries.append((parts[0].upper(), value, parts[1].endswith("%")))
+    return entries, bad
+
+def check_basket(entries, mode):
+    """
+    Raise ValueError if parsed entries don't fit the sizing mode: a basket
+    mixing % and bare values is ambiguous, and % values can't be rupee amounts.
+    """
+    percent = {flag for _, _, flag in entries}
+    if percent == {True, False}:
+        raise ValueError("Mix of % weights and bare values; use one or the other")
+    if True in percent and mode != "weights":
+        raise ValueError("% values are weights, not rupee amounts")
+
+def size_basket(symbols, values, ltp, lot_size, tick_size, mode="weights", capital=0.0):
+    """
+    Vectorized sizing for a basket buy. `values` are weights (normalised to
+    sum to 1 and applied to `capital`) or, with mode="amounts", rupee
+    budgets per symbol. Each symbol is priced at its LTP rounded to its
+    tick and bought in whole lots that fit its budget. Symbols without an
+    LTP get quantity 0. Returns one preview row per symbol.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ltp = np.asarray(ltp, dtype=np.float64)
+    lot = np.maximum(np.nan_to_num(np.asarray(lot_size, dtype=np.float64), nan=1.0), 1.0)
+    tick = np.asarray(tick_size, dtype=np.float64)
+    tick = np.where(np.isfinite(tick) & (tick > 0), tick, 0.05)
+    if mode == "weights":
+        total = values.sum()
+        budget = values / total * capital if total > 0 else np.zeros_like(values)
+    else:
+        budget = values
+
+    price = np.round(np.round(ltp / tick) * tick, 4)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lots = np.floor(budget / (price * lot))
+    lots = np.where(np.isfinite(lots) & (lots > 0), lots, 0.0)
+    qty = (lots * lot).astype(np.int64)
+    cost = np.nan_to_num(qty * price)
+    return pd.DataFrame({
+        "Symbol": list(symbols),
+        "LTP": ltp,
+        "Price": price,
+        "Lot": lot.astype(np.int64),
+        "Tick": tick,
+        "Budget": np.round(budget, 2),
+        "Qty": qty,
+        "Cost": np.round(cost, 2),
+        "Unspent": np.round(budget - cost, 2),
+    })
+
+def basket_buy_payloads(preview, exchange="NSE", price_type="LIMIT", remarks=""):
+    """CNC BUY payloads for the preview rows with a quantity; LIMIT orders use the preview price."""
+    rows = preview[preview["Qty"] > 0]
+    return [
+        order_payload(sym, exchange, "BUY", qty, "CNC", price_type, price, remarks)
+        for sym, qty, price in zip(rows["Symbol"], rows["Qty"], rows["Price"])
+    ]
@@ -0,0 +1,80 @@
+"""
+Renko / Point & Figure construction in charts vs. a per-bar loop, on
+synthetic multi-year minute closes, then a whole watchlist.
+
+    python benchmarks/bench_charts.py
+"""
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from charts import BoxScale, _swings, point_and_figure, renko
+
+BARS_PER_YEAR = 375 * 250
+SIZES = [BARS_PER_YEAR // 12, BARS_PER_YEAR, 3 * BARS_PER_YEAR]
+WATCHLIST = 50
+
+# Reference implementation: the textbook loop, one bar at a time
+def loop_swings(units, reversal, first_box):
+    direction, extreme, column, out = 0, 0, -1, []
+    for i, x in enumerate(units.tolist()):
+        high, low = math.floor(x + 1e-9), math.ceil(x - 1e-9)
+        if direction >= 0 and high > extreme:
+            column += 0 if direction else 1
+            out.extend((level, 1, i, column) for level in range(extreme + 1, high + 1))
+            direction, extreme = 1, high
+        elif direction <= 0 and low < extreme:
+            column += 0 if direction else 1
+            out.extend((level, -1, i, column) for level in range(extreme - 1, low - 1, -1))
+            direction, extreme = -1, low
+        elif direction == 1 and low <= extreme - reversal:
+            column += 1
+            out.extend((level, -1, i, column) for level in range(extreme - first_box, low - 1, -1))
+            direction, extreme = -1, low
+        elif direction == -1 and high >= extreme + reversal:
+            column += 1
+            out.extend((level, 1, i, column) for level in range(extreme + first_box, high + 1))
+            direction, extreme = 1, high
+    return out
+
+def synthetic_closes(n, seed=0):
+    # Minute closes on a 0.05 tick with about 1.5% daily volatility
+    rng = np.random.default_rng(seed)
+    closes = 1000 * np.exp(np.cumsum(rng.normal(0, 0.015 / math.sqrt(375), n)))
+    return np.round(closes * 20) / 20
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    print(f"{'bars':>9} {'loop ms':>9} {'engine ms':>10} {'speedup':>8} {'bricks':>7}  match")
+    for n in SIZES:
+        closes = synthetic_closes(n)
+        units = BoxScale(closes[0], 0.5, percent=True).units(closes)
+        t_loop, expected = best_of(lambda: loop_swings(units, 2, 2), 1)
+        t_engine, got = best_of(lambda: _swings(units, 2, 2), 5)
+        match = list(zip(*(part.tolist() for part in got))) == expected
+        print(f"{n:>9} {t_loop * 1000:>9.1f} {t_engine * 1000:>10.1f} {t_loop / t_engine:>7.1f}x {len(expected):>7}  {match}")
+
+    n = 3 * BARS_PER_YEAR
+    times = np.datetime64("2023-01-02T09:15") + np.arange(n).astype("timedelta64[m]")
+    watchlist = [synthetic_closes(n, seed) for seed in range(WATCHLIST)]
+    start = time.perf_counter()
+    for closes in watchlist:
+        renko(times, closes, 0.5, percent=True)
+        point_and_figure(times, closes, 1.0, reversal=3, percent=True)
+    elapsed = time.perf_counter() - start
+    print(f"\n{WATCHLIST} symbols x {n} minute bars: Renko 0.5% + P&F 1%x3 in {elapsed:.2f} s")
+
+if __name__ == "__main__":
+    main()
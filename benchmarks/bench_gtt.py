@@ -0,0 +1,101 @@
+"""
+Per-tick GTT/OCO trigger evaluation: TriggerIndex bisection vs. scanning
+every alert, for 100 to 100,000 alerts on one instrument. Also checks
+frame() before any instrument is priced and with only some priced.
+
+    python benchmarks/bench_gtt.py
+"""
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from gtt_triggers import NEAR_PERCENT, TriggerIndex, parse_triggers
+
+SIZES = [100, 1000, 10_000, 100_000]
+TICKS = 2000
+
+def synthetic_gtt_book(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        if i % 4 == 0:
+            rows.append({
+                "alert_id": str(i), "tradingsymbol": "SBIN-EQ", "exchange": "NSE", "token": "3045",
+                "order_type": "SELL", "target_price": f"{rng.uniform(800, 1000):.2f}",
+                "stoploss_price": f"{rng.uniform(600, 800):.2f}",
+            })
+        else:
+            rows.append({
+                "alert_id": str(i), "tradingsymbol": "SBIN-EQ", "exchange": "NSE", "token": "3045",
+                "condition": rng.choice(["LTP_ABOVE", "LTP_BELOW"]), "trigger_price": f"{rng.uniform(600, 1000):.2f}",
+            })
+    return rows
+
+# Reference implementation: check every leg on every tick
+def scan_evaluate(legs, ltp):
+    band = ltp * NEAR_PERCENT / 100
+    triggered, near = [], []
+    for t in legs:
+        gap = t.price - ltp if t.side == "above" else ltp - t.price
+        if gap <= 0:
+            triggered.append(t)
+        elif gap <= band:
+            near.append(t)
+    return triggered, near
+
+def check_frame():
+    """frame() must sort by distance with no prices at all and with only some instruments priced."""
+    rows = synthetic_gtt_book(8) + [
+        {"alert_id": "x", "tradingsymbol": "TCS-EQ", "exchange": "NSE", "token": "11536",
+         "condition": "LTP_ABOVE", "trigger_price": "4000"},
+    ]
+    index = TriggerIndex()
+    index.load(rows)
+    unpriced = index.frame()
+    assert unpriced["Distance %"].dtype.kind == "f" and unpriced["Distance %"].isna().all()
+    assert (unpriced["State"] == "No price").all()
+    index.update("NSE", "3045", 800.0)
+    partial = index.frame()
+    distance = partial["Distance %"]
+    assert distance.dtype.kind == "f"
+    assert list(partial["Symbol"].iloc[-1:]) == ["TCS-EQ"] and distance.iloc[-1:].isna().all()
+    assert distance.iloc[:-1].abs().is_monotonic_increasing
+    assert len(TriggerIndex().frame()) == 0
+    return True
+
+def main():
+    print(f"frame() with no / some prices: {check_frame()}")
+    rng = random.Random(1)
+    # A price walk around the middle of the alert range
+    prices, price = [], 800.0
+    for _ in range(TICKS):
+        price = round(price + rng.gauss(0, 0.5), 2)
+        prices.append(price)
+    print(f"{'alerts':>8} {'scan us/tick':>13} {'index us/tick':>14} {'speedup':>8}  hits match")
+    for n in SIZES:
+        rows = synthetic_gtt_book(n)
+        legs = [t for row in rows for t in parse_triggers(row)]
+        index = TriggerIndex()
+        index.load(rows)
+
+        start = time.perf_counter()
+        for p in prices:
+            scan_evaluate(legs, p)
+        t_scan = (time.perf_counter() - start) / TICKS
+
+        start = time.perf_counter()
+        for p in prices:
+            index.on_tick("NSE", "3045", SimpleNamespace(ltp=p))
+        t_index = (time.perf_counter() - start) / TICKS
+
+        expected = scan_evaluate(legs, prices[-1])
+        got = (index.triggered(), index.near())
+        match = all({(t.alert_id, t.leg) for t in a} == {(t.alert_id, t.leg) for t in b} for a, b in zip(expected, got))
+        print(f"{n:>8} {t_scan * 1e6:>13.1f} {t_index * 1e6:>14.2f} {t_scan / t_index:>7.0f}x  {match}")
+
+if __name__ == "__main__":
+    main()
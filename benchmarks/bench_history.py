@@ -0,0 +1,94 @@
+"""
+Streaming NumPy history parser vs. the split-per-line loop it replaced
+in bar_store, on synthetic minute-bar /history responses of 1k to 1M rows.
+
+    python benchmarks/bench_history.py
+"""
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from history_parser import parse_history
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+# Reference implementation: bar_store.parse_history as it was before history_parser
+def parse_bar_time(stamp):
+    stamp = stamp.strip()
+    if stamp[:8].isdigit():
+        return datetime.strptime(stamp[:12].ljust(12, "0"), "%d%m%Y%H%M")
+    return datetime.fromisoformat(stamp)
+
+def legacy_parse_history(text):
+    rows = []
+    for line in text.strip().splitlines():
+        fields = line.split(",")
+        if len(fields) < 5:
+            continue
+        try:
+            rows.append((
+                parse_bar_time(fields[0]).isoformat(timespec="minutes"),
+                float(fields[1]), float(fields[2]), float(fields[3]), float(fields[4]),
+                float(fields[5]) if len(fields) > 5 and fields[5].strip() else 0.0,
+            ))
+        except ValueError:
+            continue
+    return rows
+
+def synthetic_history(n, seed=0):
+    # Minute bars, 375 per session, in the service's ddmmyyyyHHMM format
+    rng = random.Random(seed)
+    lines = []
+    day, price = datetime(2020, 1, 1), 1000.0
+    for i in range(n):
+        if i % 375 == 0:
+            day += timedelta(days=1)
+        stamp = day + timedelta(hours=9, minutes=15 + i % 375)
+        open_ = price
+        price = max(1.0, price + rng.gauss(0, 1))
+        high, low = max(open_, price) + rng.random(), min(open_, price) - rng.random()
+        lines.append(f"{stamp:%d%m%Y%H%M},{open_:.2f},{high:.2f},{low:.2f},{price:.2f},{rng.randint(100, 50000)}")
+    return "\n".join(lines) + "\n"
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def peak_kib(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+def main():
+    print(f"{'rows':>9} {'legacy ms':>10} {'numpy ms':>9} {'speedup':>8} {'legacy KiB':>11} {'numpy KiB':>10}  closes match")
+    for n in SIZES:
+        text = synthetic_history(n)
+        body = text.encode()
+        repeat = 5 if n <= 100_000 else 1
+        # The parser reads the streamed body as a file object, like resp.raw
+        t_legacy, legacy = best_of(lambda: legacy_parse_history(text), repeat)
+        t_numpy, bars = best_of(lambda: parse_history(io.BytesIO(body)), repeat)
+        match = len(legacy) == len(bars["close"]) and np.allclose([r[4] for r in legacy], bars["close"])
+        # Peak memory beyond the response body itself
+        mem_legacy = peak_kib(lambda: legacy_parse_history(text))
+        mem_numpy = peak_kib(lambda: parse_history(io.BytesIO(body)))
+        print(f"{n:>9} {t_legacy * 1000:>10.1f} {t_numpy * 1000:>9.1f} {t_legacy / t_numpy:>7.1f}x "
+              f"{mem_legacy:>11.0f} {mem_numpy:>10.0f}  {match}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Vectorized holdings engine vs. the per-row loop it replaced in
+pages/1_Dashboard.py, on synthetic portfolios of 10 to 5,000 holdings.
+
+    python benchmarks/bench_holdings.py
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from holdings_engine import compute_holdings, display_frame, parse_holdings, quote_arrays, summarize
+from quotes import build_master_mapping_from_holdings
+
+SIZES = [10, 100, 1000, 5000]
+
+# Reference implementation: holdings_tabular as it was before holdings_engine
+def legacy_holdings_tabular(holdings_book, master_mapping, quotes):
+    raw = holdings_book.get('data', [])
+    table = []
+    total_today_pnl = 0
+    total_overall_pnl = 0
+    total_invested = 0
+    total_current = 0
+    total_realized_today = 0
+    total_realized_overall = 0
+
+    headers = [
+        "Symbol", "LTP", "Avg Buy", "Qty", "P.Close", "%Chg", "Today P&L", "Overall P&L",
+        "Realized P&L", "%Chg Avg", "Invested", "Current", "Exchange", "ISIN", "T1", "Haircut", "Coll Qty", "Sell Amt", "Trade Qty"
+    ]
+
+    for h in raw:
+        dp_qty = float(h.get("dp_qty", 0) or 0)
+        avg_buy_price = float(h.get("avg_buy_price", 0) or 0)
+        t1_qty = h.get("t1_qty", "N/A")
+        haircut = h.get("haircut", "N/A")
+        collateral_qty = h.get("collateral_qty", "N/A")
+        sell_amt = float(h.get("sell_amt", 0) or 0)
+        trade_qty = float(h.get("trade_qty", 0) or 0)
+        tradingsymbols = h.get("tradingsymbol")
+        realized_pnl = 0.0
+
+        if isinstance(tradingsymbols, list) and tradingsymbols:
+            for ts in tradingsymbols:
+                exch = ts.get("exchange", "NSE")
+                if exch != "NSE":
+                    continue
+                tsym = ts.get("tradingsymbol", "N/A")
+                isin = ts.get("isin", "N/A")
+                key = (exch, tsym)
+                segment_token = master_mapping.get(key)
+                if not segment_token:
+                    ltp, yest_close = None, None
+                else:
+                    ltp, yest_close = quotes.get(segment_token['token'], (None, None))
+                exited = (sell_amt > 0 and trade_qty > 0)
+                holding_qty = dp_qty if dp_qty > 0 else 0
+                exited_qty = trade_qty if exited else 0
+
+                if exited and exited_qty > 0:
+                    sell_price = sell_amt / exited_qty if exited_qty else 0
+                    realized_pnl = (sell_price - avg_buy_price) * exited_qty
+                    total_realized_today += realized_pnl
+                    total_realized_overall += realized_pnl
+                else:
+                    realized_pnl = 0
+
+                if holding_qty > 0:
+                    invested = avg_buy_price * holding_qty
+                    current = (ltp or 0) * holding_qty if ltp is not None else 0
+                    today_pnl = (ltp - yest_close) * holding_qty if ltp is not None and yest_close is not None else 0
+                    overall_pnl = (ltp - avg_buy_price) * holding_qty if ltp is not None else 0
+                    pct_change = ((ltp - yest_close) / yest_close * 100) if ltp is not None and yest_close not in (None, 0) else "N/A"
+                    pct_change_avg = ((ltp - avg_buy_price) / avg_buy_price * 100) if ltp is not None and avg_buy_price not in (None, 0) else "N/A"
+                else:
+                    invested = 0
+                    current = 0
+                    today_pnl = 0
+                    overall_pnl = 0
+                    pct_change = "N/A"
+                    pct_change_avg = "N/A"
+
+                # Totals only from holding qty (unrealized)
+                total_today_pnl += today_pnl
+                total_overall_pnl += overall_pnl
+                total_invested += invested
+                total_current += current
+
+                # For display: realized P&L as column
+                table.append([
+                    tsym,
+                    f"{ltp:.2f}" if ltp is not None else "N/A",
+                    f"{avg_buy_price:.2f}",
+                    int(holding_qty),
+                    f"{yest_close:.2f}" if yest_close is not None else "N/A",
+                    f"{pct_change:.2f}" if isinstance(pct_change, float) else pct_change,
+                    f"{today_pnl:.2f}" if isinstance(today_pnl, float) else today_pnl,
+                    f"{overall_pnl:.2f}" if isinstance(overall_pnl, float) else overall_pnl,
+                    f"{realized_pnl:.2f}" if realized_pnl else "",
+                    f"{pct_change_avg:.2f}" if isinstance(pct_change_avg, float) else pct_change_avg,
+                    f"{invested:.2f}",
+                    f"{current:.2f}",
+                    exch,
+                    isin,
+                    t1_qty,
+                    haircut,
+                    collateral_qty,
+                    f"{sell_amt:.2f}",
+                    int(trade_qty)
+                ])
+
+    # Add realized P&L from exited qty to totals
+    total_today_pnl += total_realized_today
+    total_overall_pnl += total_realized_overall
+
+    df = pd.DataFrame(table, columns=headers)
+    summary = {
+        "Today P&L": round(total_today_pnl, 2),
+        "Overall P&L": round(total_overall_pnl, 2),
+        "Total Invested": round(total_invested, 2),
+        "Total Current": round(total_current, 2)
+    }
+    return df, summary
+
+def engine_holdings_tabular(holdings_book, quotes):
+    columns = parse_holdings(holdings_book)
+    ltp, prev_close = quote_arrays(columns, quotes)
+    columns = compute_holdings(columns, ltp, prev_close)
+    return display_frame(columns), summarize(columns)
+
+def synthetic_portfolio(n, seed=0):
+    rng = random.Random(seed)
+    data, quotes = [], {}
+    for i in range(n):
+        token = str(1000 + i)
+        avg = rng.uniform(10, 3000)
+        exited = rng.random() < 0.1
+        data.append({
+            "dp_qty": str(rng.randint(0, 500)),
+            "avg_buy_price": f"{avg:.2f}",
+            "t1_qty": "0",
+            "haircut": "0.20",
+            "collateral_qty": "0",
+            "sell_amt": f"{avg * 1.1 * 5:.2f}" if exited else "0",
+            "trade_qty": "5" if exited else "0",
+            "tradingsymbol": [
+                {"exchange": "NSE", "tradingsymbol": f"SYM{i}-EQ", "token": token, "isin": f"INE{i:09d}"},
+                {"exchange": "BSE", "tradingsymbol": f"SYM{i}", "token": str(500000 + i), "isin": f"INE{i:09d}"},
+            ],
+        })
+        if rng.random() < 0.97:
+            quotes[token] = (avg * rng.uniform(0.8, 1.2), avg * rng.uniform(0.8, 1.2))
+    return {"data": data}, quotes
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    print(f"{'holdings':>9} {'legacy ms':>10} {'engine ms':>10} {'speedup':>8}  totals match")
+    for n in SIZES:
+        book, quotes = synthetic_portfolio(n)
+        mapping = build_master_mapping_from_holdings(book)
+        repeat = 20 if n <= 1000 else 5
+        t_legacy, (_, legacy_summary) = best_of(lambda: legacy_holdings_tabular(book, mapping, quotes), repeat)
+        t_engine, (_, engine_summary) = best_of(lambda: engine_holdings_tabular(book, quotes), repeat)
+        match = all(abs(legacy_summary[k] - engine_summary[k]) < 0.05 for k in legacy_summary)
+        print(f"{n:>9} {t_legacy * 1000:>10.2f} {t_engine * 1000:>10.2f} {t_legacy / t_engine:>7.1f}x  {match}")
+
+if __name__ == "__main__":
+    main()
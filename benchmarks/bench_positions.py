@@ -0,0 +1,127 @@
+"""
+Schema-driven positions builder vs. the per-row positions_tabular it
+replaced in pages/1_Dashboard.py: build time and table memory on synthetic
+F&O books of 10 to 20,000 positions with heterogeneous rows.
+
+    python benchmarks/bench_positions.py
+"""
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from positions_engine import parse_positions, positions_frame, summarize_positions
+
+SIZES = [10, 100, 1000, 20000]
+
+# Reference implementation: positions_tabular as it was before positions_engine
+def legacy_positions_tabular(positions_book):
+    raw = positions_book.get('positions', [])
+    table = []
+    if not raw or len(raw) == 0:
+        return pd.DataFrame(), pd.DataFrame()
+    headers = list(raw[0].keys())
+    important_cols = [
+        ("tradingsymbol", "Symbol"),
+        ("net_averageprice", "Avg. Buy"),
+        ("net_quantity", "Qty"),
+        ("unrealized_pnl", "Unrealised P&L"),
+        ("realized_pnl", "Realized P&L"),
+        ("percent_change", "% Change"),
+        ("product_type", "Product Type"),
+    ]
+    all_keys = list(raw[0].keys()) if raw else []
+    rest_keys = [k for k in all_keys if k not in [col[0] for col in important_cols]]
+    headers = [col[1] for col in important_cols] + rest_keys
+    total_unrealized = 0.0
+    total_realized = 0.0
+    for p in raw:
+        try:
+            last_price = float(p.get("lastPrice", 0))
+            avg_price = float(p.get("net_averageprice", 0))
+            if avg_price:
+                percent_change = round((last_price - avg_price) / avg_price * 100, 2)
+            else:
+                percent_change = "N/A"
+        except Exception:
+            percent_change = "N/A"
+        row = [p.get(col[0], "") for col in important_cols[:-2]]
+        row.append(percent_change)
+        row.append(p.get("product_type", ""))
+        row += [p.get(k, "") for k in rest_keys]
+        table.append(row)
+        try:
+            total_unrealized += float(p.get("unrealized_pnl", 0) or 0)
+        except Exception:
+            pass
+        try:
+            total_realized += float(p.get("realized_pnl", 0) or 0)
+        except Exception:
+            pass
+
+    summary_table = [
+        ["Total Realized P&L", round(total_realized, 2)],
+        ["Total Unrealized P&L", round(total_unrealized, 2)],
+        ["Total Net P&L", round(total_realized + total_unrealized, 2)]
+    ]
+    df_sum = pd.DataFrame(summary_table, columns=["Summary", "Amount"])
+    df = pd.DataFrame(table, columns=headers)
+    return df_sum, df
+
+def engine_positions_tabular(positions_book):
+    columns = parse_positions(positions_book)
+    return summarize_positions(columns), positions_frame(columns)
+
+def synthetic_positions(n, seed=0):
+    rng = random.Random(seed)
+    underlyings = ["NIFTY", "BANKNIFTY", "FINNIFTY", "RELIANCE", "SBIN", "TCS"]
+    rows = []
+    for i in range(n):
+        avg = rng.uniform(1, 500)
+        qty = rng.choice([-1, 1]) * rng.randint(1, 20) * 25
+        last = avg * rng.uniform(0.5, 1.5)
+        row = {
+            "tradingsymbol": f"{rng.choice(underlyings)}{rng.randint(18000, 52000)}{rng.choice(['CE', 'PE'])}",
+            "exchange": "NFO",
+            "token": str(40000 + i),
+            "product_type": rng.choice(["NORMAL", "INTRADAY"]),
+            "net_averageprice": f"{avg:.2f}",
+            "net_quantity": str(qty),
+            "lastPrice": f"{last:.2f}",
+            "unrealized_pnl": f"{(last - avg) * qty:.2f}",
+            "realized_pnl": f"{rng.uniform(-5000, 5000):.2f}",
+            "day_buy_quantity": str(max(qty, 0)),
+            "day_sell_quantity": str(max(-qty, 0)),
+            "multiplier": "1",
+        }
+        if i % 7 == 0:
+            row["expiry"] = "27-NOV-2026"
+        rows.append(row)
+    return {"positions": rows}
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    print(f"{'positions':>9} {'legacy ms':>10} {'engine ms':>10} {'legacy KiB':>11} {'engine KiB':>11}  totals match")
+    for n in SIZES:
+        book = synthetic_positions(n)
+        repeat = 10 if n <= 1000 else 3
+        t_legacy, (legacy_sum, legacy_df) = best_of(lambda: legacy_positions_tabular(book), repeat)
+        t_engine, (engine_sum, engine_df) = best_of(lambda: engine_positions_tabular(book), repeat)
+        match = (legacy_sum["Amount"] - engine_sum["Amount"]).abs().max() < 0.05
+        mem_legacy = legacy_df.memory_usage(deep=True).sum() / 1024
+        mem_engine = engine_df.memory_usage(deep=True).sum() / 1024
+        print(f"{n:>9} {t_legacy * 1000:>10.2f} {t_engine * 1000:>10.2f} {mem_legacy:>11.0f} {mem_engine:>11.0f}  {match}")
+
+if __name__ == "__main__":
+    main()
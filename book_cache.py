@@ -0,0 +1,193 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from datetime import datetime
+
+from integrate import IntegrateOrders
+from snapshot import BOOKS
+from trading_calendar import IST
+
+# Seconds a cached book is served before the next read refetches it
+DEFAULT_TTLS = {
+    "holdings": 30.0,
+    "positions": 5.0,
+    "orders": 3.0,
+    "gtt_orders": 10.0,
+    "trades": 5.0,
+}
+
+# Freshness window for /quotes: sessions asking for the same token within
+# it share one response
+QUOTE_TTL = 1.0
+
+# Books an order can change once it reaches the exchange: it lands in the
+# order book and, on a fill, in trades, positions and (for CNC) holdings.
+ORDER_BOOKS = ("orders", "trades", "positions", "holdings")
+GTT_BOOKS = ("gtt_orders",)
+
+class CachedIntegrateOrders(IntegrateOrders):
+    """
+    IntegrateOrders with a process-wide TTL cache in front of the book reads
+    and /quotes.
+
+    Concurrent reads of the same book, or quotes for the same token, share
+    one request (single flight), so several sessions rerunning at once cost
+    the broker a single call per unique key. Every order, GTT and OCO
+    mutation invalidates the books it can affect, so the next read after a
+    place/modify/cancel always goes to the broker: it neither hits the
+    cache nor joins a request that started before the invalidation.
+    fresh=True reads always send their own request.
+
+    read_book() also reports when the request behind a book's payload was
+    sent and answered, and how long that took, so a snapshot built from
+    cache hits is not stamped as live.
+
+    stats counts, per kind ("holdings", ..., "quotes"), cache hits, misses
+    (requests actually sent) and coalesced reads that waited on another
+    caller's request.
+    """
+
+    def __init__(self, conn, ttls=None, quote_ttl=QUOTE_TTL):
+        super().__init__(conn)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.quote_ttl = quote_ttl
+        self._lock = threading.Lock()
+        self._entries = {}     # key -> (payload, monotonic fetch time, wall-clock fetch time, latency, wall-clock request start)
+        self._inflight = {}    # key -> Future shared by concurrent readers
+        self._generation = {}  # book -> bumped on invalidate; stale fetches are not stored
+        self.stats = {kind: Counter() for kind in (*self.ttls, "quotes")}
+        self._listeners = []
+
+    def _entry(self, key, kind, ttl, fetch, fresh=False):
+        # (entry, hit): the cached entry if fresh enough, else one fetched now
+        # or by the request already in flight for the current generation
+        stats = self.stats[kind]
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if not fresh and entry is not None and now - entry[1] < ttl:
+                stats["hits"] += 1
+                return entry, True
+            future = None if fresh else self._inflight.get(key)
+            if future is not None:
+                stats["coalesced"] += 1
+                leader = False
+            else:
+                stats["misses"] += 1
+                # Later readers join this request, the newest one in flight
+                future = self._inflight[key] = Future()
+                generation = self._generation.get(key, 0)
+                leader = True
+        if not leader:
+            return future.result(), False
+
+        start, requested_at = time.perf_counter(), datetime.now(IST)
+        try:
+            payload = fetch()
+        except BaseException as e:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+            future.set_exception(e)
+            raise
+        entry = (payload, time.monotonic(), datetime.now(IST), time.perf_counter() - start, requested_at)
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            # A mutation during the fetch may have made this payload stale
+            if self._generation.get(key, 0) == generation:
+                self._entries[key] = entry
+        future.set_result(entry)
+        return entry, False
+
+    def _cached(self, key, kind, ttl, fetch, fresh=False):
+        return self._entry(key, kind, ttl, fetch, fresh)[0][0]
+
+    def invalidate(self, *books):
+        """Drop the given books (all of them when none are named) so the next read refetches."""
+        books = books or tuple(self.ttls)
+        with self._lock:
+            for book in books:
+                self._entries.pop(book, None)
+                # A request already in flight may predate the mutation; later reads must not join it
+                self._inflight.pop(book, None)
+                self._generation[book] = self._generation.get(book, 0) + 1
+            listeners = list(self._listeners)
+        for callback in listeners:
+            callback(books)
+
+    def add_invalidation_listener(self, callback):
+        """Call callback(books) after every invalidation, e.g. to refresh views early."""
+        with self._lock:
+            self._listeners.append(callback)
+
+    def _book(self, book, fetch, fresh):
+        return self._cached(book, book, self.ttls[book], fetch, fresh)
+
+    def _mutate(self, books, call, *args, **kwargs):
+        # Invalidate even when the call raises: a timed-out POST may still have reached the broker
+        try:
+            return call(*args, **kwargs)
+        finally:
+            self.invalidate(*books)
+
+    def read_book(self, book, fresh=False):
+        """
+        (payload, requested_at, fetched_at, latency, cached) for a book:
+        the wall-clock times the request that produced the payload was sent
+        and answered, its duration, and whether it came from the cache (or
+        another caller's request).
+        """
+        fetch = getattr(super(), BOOKS[book])
+        (payload, _, fetched_at, latency, requested_at), hit = self._entry(book, book, self.ttls[book], fetch, fresh)
+        return payload, requested_at, fetched_at, latency, hit
+
+    # --- Cached reads ---
+    def holdings(self, fresh=False):
+        return self._book("holdings", super().holdings, fresh)
+
+    def positions(self, fresh=False):
+        return self._book("positions", super().positions, fresh)
+
+    def orders(self, fresh=False):
+        return self._book("orders", super().orders, fresh)
+
+    def gtt_orders(self, fresh=False):
+        return self._book("gtt_orders", super().gtt_orders, fresh)
+
+    def trade_book(self, fresh=False):
+        return self._book("trades", super().trade_book, fresh)
+
+    def quotes(self, exchange, token, fresh=False):
+        fetch = super().quotes
+        key = ("quotes", str(exchange).upper(), str(token))
+        return self._cached(key, "quotes", self.quote_ttl, lambda: fetch(exchange, token), fresh)
+
+    # --- Mutations ---
+    def place_order(self, *args, **kwargs):
+        return self._mutate(ORDER_BOOKS, super().place_order, *args, **kwargs)
+
+    def modify_order(self, *args, **kwargs):
+        return self._mutate(ORDER_BOOKS, super().modify_order, *args, **kwargs)
+
+    def cancel_order(self, order_id):
+        return self._mutate(ORDER_BOOKS, super().cancel_order, order_id)
+
+    def place_gtt_order(self, *args, **kwargs):
+        return self._mutate(GTT_BOOKS, super().place_gtt_order, *args, **kwargs)
+
+    def place_oco_order(self, *args, **kwargs):
+        return self._mutate(GTT_BOOKS, super().place_oco_order, *args, **kwargs)
+
+    def modify_gtt_order(self, data):
+        return self._mutate(GTT_BOOKS, super().modify_gtt_order, data)
+
+    def modify_oco_order(self, data):
+        return self._mutate(GTT_BOOKS, super().modify_oco_order, data)
+
+    def cancel_gtt_order(self, alert_id):
+        return self._mutate(GTT_BOOKS, super().cancel_gtt_order, alert_id)
+
+    def cancel_oco_order(self, alert_id):
+        return self._mutate(GTT_BOOKS, super().cancel_oco_order, alert_id)
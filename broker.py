@@ -0,0 +1,175 @@
+import streamlit as st
+from book_cache import CachedIntegrateOrders
+from integrate import ConnectToIntegrate
+from bar_store import BarStore
+from close_cache import CloseCache
+from gtt_triggers import TriggerIndex
+from instruments import InstrumentMaster
+from market_feed import WS_URL, MarketFeed
+from order_book import LocalOrderBook
+from refresher import BackgroundRefresher
+from scan import Scanner
+from symbol_search import SymbolSearch
+from trading_calendar import default_calendar
+
+# Process-wide broker objects shared by every page and rerun.
+# st.cache_resource keeps one instance per set of credentials, so the
+# pooled keep-alive connections survive Streamlit reruns.
+
+@st.cache_resource
+def _connect(api_token, api_secret, uid, actid, api_session_key, ws_session_key, pool_size, connect_timeout, read_timeout, rate_limits):
+    conn = ConnectToIntegrate(
+        pool_size=pool_size, connect_timeout=connect_timeout, read_timeout=read_timeout,
+        rate_limits={group: (rate, burst) for group, rate, burst in rate_limits},
+    )
+    conn.login(api_token, api_secret)
+    conn.set_session_keys(uid, actid, api_session_key, ws_session_key)
+    # Book reads are cached process-wide; see book_cache for TTLs and invalidation
+    return CachedIntegrateOrders(conn)
+
+def get_integrate():
+    secrets = st.secrets
+    return _connect(
+        secrets["integrate_api_token"],
+        secrets["integrate_api_secret"],
+        secrets["integrate_uid"],
+        secrets["integrate_actid"],
+        secrets["integrate_api_session_key"],
+        secrets["integrate_ws_session_key"],
+        int(secrets.get("integrate_pool_size", 10)),
+        float(secrets.get("integrate_connect_timeout", 5)),
+        float(secrets.get("integrate_read_timeout", 15)),
+        # [rate_limits] section: group = [requests_per_second, burst]; groups are
+        # total, orders, books, quotes and history (see rate_limit.DEFAULT_LIMITS)
+        tuple(
+            (group, float(limit[0]), int(limit[1]))
+            for group, limit in sorted(secrets.get("rate_limits", {}).items())
+        ),
+    )
+
+@st.cache_resource
+def _close_cache(directory):
+    return CloseCache(directory)
+
+def get_close_cache():
+    return _close_cache(st.secrets.get("cache_dir"))
+
+@st.cache_resource
+def _bar_store(directory):
+    return BarStore(directory)
+
+def get_bar_store():
+    return _bar_store(st.secrets.get("cache_dir"))
+
+@st.cache_resource
+def _scanner(max_workers):
+    return Scanner(max_workers=max_workers)
+
+def get_scanner():
+    """Shared indicator Scanner; its worker processes outlive reruns. Secret scan_workers (default: all cores)."""
+    return _scanner(int(st.secrets.get("scan_workers", 0)) or None)
+
+def get_calendar():
+    return default_calendar(st.secrets.get("holiday_file"))
+
+@st.cache_resource
+def _market_feed(uid, actid, ws_session_key, url):
+    return MarketFeed(uid, actid, ws_session_key, url=url).start()
+
+def get_market_feed():
+    secrets = st.secrets
+    return _market_feed(
+        secrets["integrate_uid"],
+        secrets["integrate_actid"],
+        secrets["integrate_ws_session_key"],
+        secrets.get("integrate_ws_url", WS_URL),
+    )
+
+@st.cache_resource(show_spinner="Loading instrument master...")
+def _instruments(path, cache_dir):
+    return InstrumentMaster.load(path, cache_dir)
+
+def get_instruments():
+    return _instruments(st.secrets.get("instrument_master_path"), st.secrets.get("cache_dir"))
+
+def instrument_token(exchange, tradingsymbol):
+    """Token from the instrument master, or None if it is unknown or the master cannot be loaded."""
+    try:
+        return get_instruments().token_for(exchange, tradingsymbol)
+    except Exception:
+        return None
+
+def instrument_tick_size(exchange, token):
+    """Tick size from the instrument master, or None if it is unknown or the master cannot be loaded."""
+    try:
+        inst = get_instruments().by_token(exchange, token)
+    except Exception:
+        return None
+    return inst.tick_size if inst and inst.tick_size > 0 else None
+
+@st.cache_resource
+def _symbol_search(path, cache_dir):
+    return SymbolSearch(_instruments(path, cache_dir))
+
+def get_symbol_search():
+    """Shared SymbolSearch, or None when the instrument master cannot be loaded."""
+    try:
+        return _symbol_search(st.secrets.get("instrument_master_path"), st.secrets.get("cache_dir"))
+    except Exception:
+        return None
+
+@st.cache_resource
+def _refresher(interval, quote_workers):
+    return BackgroundRefresher(
+        get_integrate(),
+        interval=interval,
+        cache=get_close_cache(),
+        calendar=get_calendar(),
+        feed=get_market_feed(),
+        quote_workers=quote_workers,
+    ).start()
+
+def get_refresher():
+    """The process-wide BackgroundRefresher; pages render from its latest() state."""
+    return _refresher(
+        float(st.secrets.get("refresh_interval", 5)),
+        int(st.secrets.get("quote_concurrency", 8)),
+    )
+
+def refreshed_state(wait=30):
+    """Latest RefreshState for a page to render, stopping the page with a notice until the first one arrives."""
+    refresher = get_refresher()
+    state = refresher.latest(wait=wait)
+    if state is None:
+        st.warning(f"Waiting for the first broker refresh... {refresher.last_error or ''}")
+        st.stop()
+    return state
+
+@st.cache_resource
+def _order_book():
+    book = LocalOrderBook()
+    # Stream updates as they happen; every refresher round reconciles (and covers a dropped stream)
+    get_market_feed().add_order_listener(book.apply)
+    get_refresher().add_listener(lambda state: "orders" in state.snapshot and book.load_fetch(state.snapshot["orders"]))
+    return book
+
+def get_order_book():
+    """Process-wide LocalOrderBook kept current by the order stream and the background refresher."""
+    return _order_book()
+
+@st.cache_resource
+def _trigger_index():
+    index = TriggerIndex(token_for=instrument_token)
+    feed = get_market_feed()
+    feed.add_listener(index.on_tick)
+
+    def reload(state):
+        if "gtt_orders" in state.snapshot and index.load_fetch(state.snapshot["gtt_orders"]):
+            feed.subscribe(index.instruments())
+
+    get_refresher().add_listener(reload)
+    return index
+
+def get_trigger_index():
+    """Process-wide GTT/OCO TriggerIndex, reloaded from every refresh and evaluated on every streamed tick."""
+    return _trigger_index()
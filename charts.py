@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+RENKO_COLUMNS = ["time", "open", "close", "direction", "bar"]
+PNF_COLUMNS = ["column", "type", "start", "end", "low", "high", "boxes"]
+
+# Tolerance when snapping prices to box levels, in boxes, so closes that sit
+# exactly on a level are not lost to floating point
+_EPS = 1e-9
+
+class BoxScale:
+    """
+    Maps prices to box levels and back, anchored at `base` (level 0).
+
+    Fixed boxes are `size` rupees apart. Percentage boxes (`percent=True`,
+    `size` in percent) are evenly spaced in log price, so every box is the
+    same percentage move.
+    """
+
+    def __init__(self, base, size, percent=False):
+        if size <= 0 or base <= 0:
+            raise ValueError("box size and base price must be positive")
+        self.base = float(base)
+        self.size = float(size)
+        self.percent = percent
+        self._step = np.log1p(self.size / 100) if percent else self.size
+
+    def units(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        if self.percent:
+            return np.log(prices / self.base) / self._step
+        return (prices - self.base) / self._step
+
+    def price(self, levels):
+        levels = np.asarray(levels, dtype=np.float64)
+        if self.percent:
+            return self.base * np.exp(levels * self._step)
+        return self.base + levels * self._step
+
+def _turning_points(units):
+    """
+    Bar indices worth visiting: where the close reaches a new box level
+    (floor or ceiling changes) and, among those, only the local extremes
+    of the move plus the last one. Between two turning points the close
+    only moves one way, so no box decision can happen in between.
+    """
+    floor = np.floor(units + _EPS).astype(np.int64)
+    ceil = np.ceil(units - _EPS).astype(np.int64)
+    moved = np.empty(len(units), dtype=bool)
+    moved[0] = True
+    moved[1:] = (floor[1:] != floor[:-1]) | (ceil[1:] != ceil[:-1])
+    cand = np.flatnonzero(moved)
+    if len(cand) < 3:
+        return floor, ceil, cand[1:]
+    step = np.sign(np.diff(units[cand]))
+    turns = np.flatnonzero(step[1:] != step[:-1]) + 1
+    return floor, ceil, np.append(cand[turns], cand[-1])
+
+def _swings(units, reversal, first_box):
+    """
+    The box construction shared by Renko and Point & Figure, in box units.
+
+    A column extends one box at a time in its direction and reverses once
+    the close is `reversal` boxes past its extreme; the first box of the
+    new column sits `first_box` boxes from that extreme. The first column
+    starts as soon as the close is one box from the anchor.
+
+    Returns (levels, directions, bars, columns): one entry per box added,
+    with the box level, +1/-1, the bar that completed it, and the column
+    number it belongs to.
+    """
+    floor, ceil, turns = _turning_points(units)
+    # Only the decisions walk the turning points in Python; each run of
+    # boxes is recorded as (direction, first level, last level, trigger
+    # level, column, last turn, this turn) and expanded vectorized below
+    runs = []
+    direction, extreme, column, prev = 0, 0, -1, 0
+    for i, high, low in zip(turns.tolist(), floor[turns].tolist(), ceil[turns].tolist()):
+        if direction >= 0 and high > extreme:
+            column += 0 if direction else 1
+            runs.append((1, extreme + 1, high, extreme + 1, column, prev, i))
+            direction, extreme = 1, high
+        elif direction <= 0 and low < extreme:
+            column += 0 if direction else 1
+            runs.append((-1, extreme - 1, low, extreme - 1, column, prev, i))
+            direction, extreme = -1, low
+        elif direction == 1 and low <= extreme - reversal:
+            column += 1
+            runs.append((-1, extreme - first_box, low, extreme - reversal, column, prev, i))
+            direction, extreme = -1, low
+        elif direction == -1 and high >= extreme + reversal:
+            column += 1
+            runs.append((1, extreme + first_box, high, extreme + reversal, column, prev, i))
+            direction, extreme = 1, high
+        prev = i
+    if not runs:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, empty
+
+    sign, start, stop, trigger, col, after, until = np.array(runs, dtype=np.int64).T
+    counts = np.abs(stop - start) + 1
+    run_of = np.repeat(np.arange(len(runs)), counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    levels = start[run_of] + sign[run_of] * offset
+
+    # The close moves one way between turns, so within a run's bars
+    # (after, until] the floor (up) or negated ceiling (down) never
+    # decreases. Keyed by run, all runs' bars form one sorted array and a
+    # single binary search finds the bar that completed every box; boxes
+    # drawn by a reversal all appear on the bar that triggered it.
+    lengths = until - after
+    bar_run = np.repeat(np.arange(len(runs)), lengths)
+    bar_index = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + after[bar_run] + 1
+    moved = np.where(sign[bar_run] > 0, floor[bar_index], -ceil[bar_index])
+    target = np.where(sign[run_of] > 0, np.maximum(levels, trigger[run_of]), -np.minimum(levels, trigger[run_of]))
+    low = min(moved.min(), target.min())
+    width = max(moved.max(), target.max()) - low + 1
+    at = np.searchsorted(bar_run * width + (moved - low), run_of * width + (target - low), "left")
+    return levels, sign[run_of], bar_index[at], col[run_of]
+
+def renko(times, closes, box, percent=False, base=None):
+    """
+    Renko bricks from close prices: one row per brick with the time of
+    the bar that completed it, brick open/close prices, direction (+1 up,
+    -1 down) and the bar index. `box` is in rupees, or in percent with
+    `percent=True`; bricks are anchored at `base` (the first close by
+    default). A reversal takes two boxes, as usual.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) == 0:
+        return pd.DataFrame(columns=RENKO_COLUMNS)
+    scale = BoxScale(closes[0] if base is None else base, box, percent)
+    levels, directions, bars, _ = _swings(scale.units(closes), reversal=2, first_box=2)
+    return pd.DataFrame({
+        "time": np.asarray(times)[bars],
+        "open": scale.price(levels - directions),
+        "close": scale.price(levels),
+        "direction": directions,
+        "bar": bars,
+    })
+
+def point_and_figure(times, closes, box, reversal=3, percent=False, base=None):
+    """
+    Point & Figure columns from close prices: one row per column with its
+    type ("X" rising, "O" falling), the times of its first and last box,
+    the low and high box prices, and the number of boxes. A new column
+    starts once the close moves `reversal` boxes against the current one.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) == 0:
+        return pd.DataFrame(columns=PNF_COLUMNS)
+    scale = BoxScale(closes[0] if base is None else base, box, percent)
+    levels, directions, bars, columns = _swings(scale.units(closes), reversal=reversal, first_box=1)
+    if len(levels) == 0:
+        return pd.DataFrame(columns=PNF_COLUMNS)
+    # Boxes arrive grouped by column, so each column is a contiguous slice
+    starts = np.flatnonzero(np.diff(columns, prepend=-1))
+    ends = np.append(starts[1:], len(levels)) - 1
+    times = np.asarray(times)
+    return pd.DataFrame({
+        "column": columns[starts],
+        "type": np.where(directions[starts] > 0, "X", "O"),
+        "start": times[bars[starts]],
+        "end": times[bars[ends]],
+        "low": scale.price(np.minimum(levels[starts], levels[ends])),
+        "high": scale.price(np.maximum(levels[starts], levels[ends])),
+        "boxes": ends - starts + 1,
+    })
+
+def chart_summary(bricks, columns, last_close=None):
+    """
+    One-line state of a symbol's Renko and P&F charts for a watchlist
+    table: current brick direction and streak, current P&F column and
+    its size.
+    """
+    row = {"Renko": None, "Streak": 0, "Last Brick": None, "P&F": None, "Boxes": 0, "Last Close": last_close}
+    if len(bricks):
+        direction = bricks["direction"].to_numpy()
+        last = direction[-1]
+        changes = np.flatnonzero(direction != last)
+        row.update({
+            "Renko": "Up" if last > 0 else "Down",
+            "Streak": int(len(direction) - (changes[-1] + 1 if len(changes) else 0)),
+            "Last Brick": bricks["time"].iloc[-1],
+        })
+    if len(columns):
+        row.update({"P&F": columns["type"].iloc[-1], "Boxes": int(columns["boxes"].iloc[-1])})
+    return row
+
+def chart_watchlist(frames, box, reversal=3, percent=False):
+    """
+    Renko and P&F for every bar frame in `frames` ({key: bar_store frame}).
+    Returns (summary DataFrame indexed by key, {key: (bricks, columns)}).
+    """
+    charts, rows = {}, {}
+    for key, frame in frames.items():
+        times = frame["time"].to_numpy("datetime64[m]")
+        closes = frame["close"].to_numpy(np.float64)
+        bricks = renko(times, closes, box, percent)
+        columns = point_and_figure(times, closes, box, reversal, percent)
+        charts[key] = (bricks, columns)
+        rows[key] = chart_summary(bricks, columns, closes[-1] if len(closes) else None)
+    return pd.DataFrame.from_dict(rows, orient="index"), charts
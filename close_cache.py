@@ -0,0 +1,45 @@
+import os
+import sqlite3
+import threading
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "DEFINEDGE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "definedge")
+)
+
+class CloseCache:
+    """
+    On-disk daily closes keyed by (segment, token, date). Only completed
+    sessions should be stored, since a close never changes once written.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, "closes.sqlite")
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS closes ("
+                "segment TEXT, token TEXT, date TEXT, close REAL, "
+                "PRIMARY KEY (segment, token, date))"
+            )
+
+    def get(self, segment, token, day):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT close FROM closes WHERE segment=? AND token=? AND date=?",
+                (segment, str(token), day.isoformat()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def store(self, segment, token, closes):
+        """Store {date: close} for completed sessions."""
+        rows = [(segment, str(token), d.isoformat(), float(c)) for d, c in closes.items()]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO closes VALUES (?, ?, ?, ?)", rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,216 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Percent from the trigger price within which an alert counts as near
+NEAR_PERCENT = 1.0
+
+TRIGGER_COLUMNS = ["Alert ID", "Symbol", "Leg", "Condition", "Trigger", "LTP", "Distance %", "State"]
+
+# One trigger price to watch: a single GTT, or one leg of an OCO. `side` is
+# "above" (fires once LTP >= price) or "below" (fires once LTP <= price).
+Trigger = namedtuple("Trigger", "alert_id leg side price tradingsymbol exchange token order")
+
+def _price(row, *names):
+    for name in names:
+        try:
+            value = float(row.get(name))
+        except (TypeError, ValueError):
+            continue
+        if value > 0:
+            return value
+    return None
+
+def _side(condition):
+    condition = str(condition or "").upper()
+    if "ABOVE" in condition or condition in (">", ">="):
+        return "above"
+    if "BELOW" in condition or condition in ("<", "<="):
+        return "below"
+    return None
+
+def parse_triggers(row, token_for=None):
+    """
+    Trigger legs of one /gttorders row. A single GTT is watched at its
+    trigger (or alert) price on its condition's side. An OCO has a target
+    and a stoploss leg; for a SELL (exiting a long) the target is above
+    and the stoploss below, and the other way round for a BUY. Rows with
+    no token (and no `token_for(exchange, tradingsymbol)` to resolve one),
+    no price or no known condition give no legs.
+    """
+    exchange, symbol = row.get("exchange", "NSE"), row.get("tradingsymbol", "")
+    token = row.get("token") or (token_for(exchange, symbol) if token_for else None)
+    if not token:
+        return []
+    make = lambda leg, side, price: Trigger(
+        str(row.get("alert_id", "")), leg, side, price, symbol, str(exchange), str(token), row,
+    )
+    if row.get("stoploss_price") or row.get("stoploss_trigger"):
+        sell = str(row.get("order_type", "SELL")).upper() == "SELL"
+        legs = [
+            ("TARGET", "above" if sell else "below", _price(row, "target_trigger", "target_price")),
+            ("STOPLOSS", "below" if sell else "above", _price(row, "stoploss_trigger", "stoploss_price")),
+        ]
+        return [make(leg, side, price) for leg, side, price in legs if price]
+    side = _side(row.get("condition"))
+    price = _price(row, "trigger_price", "alert_price")
+    return [make("GTT", side, price)] if side and price else []
+
+class _Side:
+    """Trigger prices of one side for one instrument, sorted, with their triggers in the same order."""
+
+    __slots__ = ("prices", "triggers")
+
+    def __init__(self, triggers=()):
+        self.triggers = sorted(triggers, key=lambda t: t.price)
+        self.prices = [t.price for t in self.triggers]
+
+class TriggerIndex:
+    """
+    GTT/OCO trigger prices indexed per (exchange, token), each side in a
+    sorted list, checked against live prices.
+
+    A tick bisects instead of scanning: "above" triggers at or under the
+    LTP have fired and those up to NEAR_PERCENT over it are near; "below"
+    triggers mirror that. Only the four slice bounds are kept per tick,
+    so on_tick() costs O(log n) in the instrument's alert count however
+    many alerts have fired; the trigger lists are sliced when read.
+
+    load() rebuilds the index from a /gttorders payload (the refresher
+    feeds it), and on_tick() is a MarketFeed listener that keeps the
+    latest LTP and evaluation per instrument for the pages to read.
+    """
+
+    def __init__(self, token_for=None, near_percent=NEAR_PERCENT):
+        self.token_for = token_for
+        self.near_percent = near_percent
+        self._lock = threading.Lock()
+        self._index = {}    # (exchange, token) -> {"above": _Side, "below": _Side}
+        self._ltp = {}      # (exchange, token) -> last price seen
+        self._bounds = {}   # (exchange, token) -> _bounds() at that price
+        self._last_payload = None
+        self.skipped = 0
+        self.ticks = 0
+        self.updated_at = None
+
+    def __len__(self):
+        return sum(len(s.prices) for sides in self._index.values() for s in sides.values())
+
+    def load(self, rows):
+        """Rebuild from /gttorders rows; rows with no watchable legs are counted in `skipped`."""
+        grouped, skipped = {}, 0
+        for row in rows:
+            legs = parse_triggers(row, self.token_for)
+            skipped += not legs
+            for trigger in legs:
+                sides = grouped.setdefault((trigger.exchange, trigger.token), {"above": [], "below": []})
+                sides[trigger.side].append(trigger)
+        index = {key: {side: _Side(triggers) for side, triggers in sides.items()} for key, sides in grouped.items()}
+        with self._lock:
+            self._index, self.skipped = index, skipped
+            # Re-evaluate at the last known prices so the views reflect the new book at once
+            self._bounds = {key: self._bounds_at(key, ltp) for key, ltp in self._ltp.items() if key in index}
+            self.updated_at = time.time()
+        return len(self)
+
+    def load_fetch(self, fetch):
+        """load() from a snapshot.BookFetch of gtt_orders; a failed fetch or a cache hit is a no-op."""
+        if not fetch.ok or fetch.data is self._last_payload:
+            return 0
+        self._last_payload = fetch.data
+        return self.load(fetch.rows)
+
+    def instruments(self):
+        """(exchange, token) pairs with at least one trigger, for MarketFeed.subscribe."""
+        with self._lock:
+            return list(self._index)
+
+    def prices(self):
+        """{(exchange, token): last price} for instruments evaluated so far."""
+        with self._lock:
+            return dict(self._ltp)
+
+    def _bounds_at(self, key, ltp):
+        # (above fired up to, above near up to, below near from, below fired from)
+        sides = self._index[key]
+        band = ltp * self.near_percent / 100
+        above, below = sides["above"].prices, sides["below"].prices
+        fired_above = bisect_right(above, ltp)
+        fired_below = bisect_left(below, ltp)
+        return (
+            fired_above, bisect_right(above, ltp + band, fired_above),
+            bisect_left(below, ltp - band, 0, fired_below), fired_below,
+        )
+
+    def _hits(self, key):
+        # (triggered, near) trigger lists at the key's last evaluated price
+        bounds = self._bounds.get(key)
+        if bounds is None:
+            return [], []
+        fired_above, near_above, near_below, fired_below = bounds
+        above, below = self._index[key]["above"].triggers, self._index[key]["below"].triggers
+        return (
+            above[:fired_above] + below[fired_below:],
+            above[fired_above:near_above] + below[near_below:fired_below],
+        )
+
+    def update(self, exchange, token, ltp):
+        """Record a price for one instrument; returns False if it has no triggers."""
+        key = (str(exchange), str(token))
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._ltp[key] = ltp
+            self._bounds[key] = self._bounds_at(key, ltp)
+            self.ticks += 1
+        return True
+
+    def evaluate(self, exchange, token, ltp):
+        """update() and return the (triggered, near) triggers at `ltp`."""
+        self.update(exchange, token, ltp)
+        with self._lock:
+            return self._hits((str(exchange), str(token)))
+
+    def on_tick(self, segment, token, tick):
+        """MarketFeed listener."""
+        if tick.ltp is not None:
+            self.update(segment, token, tick.ltp)
+
+    def triggered(self):
+        with self._lock:
+            return [t for key in self._bounds for t in self._hits(key)[0]]
+
+    def near(self):
+        with self._lock:
+            return [t for key in self._bounds for t in self._hits(key)[1]]
+
+    def frame(self):
+        """Every indexed trigger with LTP, distance and state (Triggered / Near / Waiting), closest first."""
+        rows = []
+        with self._lock:
+            for key, sides in self._index.items():
+                ltp = self._ltp.get(key)
+                triggered, near = self._hits(key)
+                states = {id(t): "Triggered" for t in triggered}
+                states.update({id(t): "Near" for t in near})
+                for side in sides.values():
+                    for t in side.triggers:
+                        rows.append({
+                            "Alert ID": t.alert_id,
+                            "Symbol": t.tradingsymbol,
+                            "Leg": t.leg,
+                            "Condition": f"LTP {'>=' if t.side == 'above' else '<='} {t.price:g}",
+                            "Trigger": t.price,
+                            "LTP": ltp,
+                            "Distance %": (t.price / ltp - 1) * 100 if ltp else np.nan,
+                            "State": states.get(id(t), "Waiting" if ltp else "No price"),
+                        })
+        frame = pd.DataFrame(rows, columns=TRIGGER_COLUMNS)
+        # Float even when no instrument has a price yet (all NaN), so abs() works
+        frame["Distance %"] = frame["Distance %"].astype(float)
+        order = frame["Distance %"].abs().fillna(float("inf")).argsort(kind="stable")
+        return frame.iloc[order].reset_index(drop=True)
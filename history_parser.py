@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+# /history CSV columns in file order; the service sends no header, and
+# omits trailing columns (volume, open interest) for some instruments.
+HISTORY_COLUMNS = ["time", "open", "high", "low", "close", "volume", "oi"]
+PRICE_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# Rows parsed per chunk: bounds the memory held besides the output arrays
+CHUNK_ROWS = 100_000
+
+def _decode_times(values):
+    """
+    datetime64[m] from a timestamp column. 'ddmmyyyy[HHMM]' stamps arrive
+    as integers from the C parser and are decoded arithmetically; anything
+    else (ISO text) goes through pd.to_datetime.
+    """
+    if values.dtype.kind in "iu":
+        stamps = values.astype(np.int64)
+        # ddmmyyyy without a time of day is eight digits
+        stamps = np.where(stamps < 10**8, stamps * 10**4, stamps)
+        day, month = stamps // 10**10, stamps // 10**8 % 100
+        year, hour, minute = stamps // 10**4 % 10**4, stamps // 100 % 100, stamps % 100
+        months = (year - 1970) * 12 + month - 1
+        days = months.astype("datetime64[M]").astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+        return days.astype("datetime64[m]") + (hour * 60 + minute).astype("timedelta64[m]")
+    text = pd.Series(values, dtype=str).str.strip()
+    digits = text.str.fullmatch(r"\d{8}(?:\d{4})?").to_numpy(bool)
+    out = pd.to_datetime(text.where(~digits), format="mixed", errors="coerce").to_numpy("datetime64[m]")
+    if digits.any():
+        # Stray text in the column made it strings; decode the stamps that are digits anyway
+        out[digits] = _decode_times(text[digits].astype(np.int64).to_numpy())
+    return out
+
+def empty_history():
+    return {"time": np.empty(0, "datetime64[m]"), **{c: np.empty(0, np.float64) for c in PRICE_COLUMNS}}
+
+def parse_history(source, chunk_rows=CHUNK_ROWS):
+    """
+    Parse a /history CSV body into columnar NumPy arrays: "time"
+    (datetime64[m]) and float64 open/high/low/close/volume (0 where
+    missing). `source` is the text, bytes, or a binary file object such
+    as a streaming response's raw body; file objects are read chunk by
+    chunk, so the whole body is never held as one string. Unparseable
+    rows are dropped.
+    """
+    if isinstance(source, str):
+        source = source.encode()
+    if isinstance(source, (bytes, bytearray)):
+        if not source.strip():
+            return empty_history()
+        source = io.BytesIO(source)
+    try:
+        reader = pd.read_csv(
+            source, header=None, names=HISTORY_COLUMNS,
+            chunksize=chunk_rows, engine="c", skip_blank_lines=True,
+        )
+        chunks = []
+        for frame in reader:
+            prices = {c: pd.to_numeric(frame[c], errors="coerce").to_numpy(np.float64) for c in PRICE_COLUMNS}
+            times = frame["time"].to_numpy()
+            times = _decode_times(times if times.dtype.kind in "iu" else times.astype(str))
+            good = ~np.isnan(prices["close"]) & ~np.isnat(times)
+            chunk = {"time": times[good]}
+            chunk.update({c: values[good] for c, values in prices.items()})
+            chunk["volume"] = np.nan_to_num(chunk["volume"])
+            chunks.append(chunk)
+    except pd.errors.EmptyDataError:
+        return empty_history()
+    if not chunks:
+        return empty_history()
+    return {name: np.concatenate([c[name] for c in chunks]) for name in chunks[0]}
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# Columns parsed from the /holdings payload, one row per listed tradingsymbol
+NUMERIC_FIELDS = ["dp_qty", "avg_buy_price", "sell_amt", "trade_qty", "t1_qty", "haircut", "collateral_qty"]
+
+# Display name -> engine column, in the order the Dashboard shows them
+DISPLAY_COLUMNS = {
+    "Symbol": "symbol",
+    "LTP": "ltp",
+    "Avg Buy": "avg_buy_price",
+    "Qty": "qty",
+    "P.Close": "prev_close",
+    "%Chg": "pct_change",
+    "Today P&L": "today_pnl",
+    "Overall P&L": "overall_pnl",
+    "Realized P&L": "realized_pnl",
+    "%Chg Avg": "pct_change_avg",
+    "Invested": "invested",
+    "Current": "current",
+    "Exchange": "exchange",
+    "ISIN": "isin",
+    "T1": "t1_qty",
+    "Haircut": "haircut",
+    "Coll Qty": "collateral_qty",
+    "Sell Amt": "sell_amt",
+    "Trade Qty": "trade_qty",
+}
+
+# Columns shown with two decimals; the rest are labels or whole quantities
+PRICE_COLUMNS = [
+    "LTP", "Avg Buy", "P.Close", "%Chg", "Today P&L", "Overall P&L", "Realized P&L",
+    "%Chg Avg", "Invested", "Current", "Haircut", "Sell Amt",
+]
+
+def to_float_array(values):
+    # Broker numbers arrive as strings; convert the whole column in C and only
+    # fall back to pandas' per-value coercion when something is not a number.
+    try:
+        return np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").to_numpy(np.float64)
+
+def parse_holdings(holdings_book, exchange="NSE"):
+    """
+    Flatten the /holdings payload into typed columns ({name: ndarray}) with
+    one row per `exchange` tradingsymbol. Non-numeric values become NaN;
+    quantities and amounts become 0, as the broker omits them when nil.
+    The engine stays on plain arrays; display_frame builds the one DataFrame.
+    """
+    labels = {"symbol": [], "isin": [], "token": []}
+    numbers = {f: [] for f in NUMERIC_FIELDS}
+    raw = holdings_book.get("data", []) if isinstance(holdings_book, dict) else []
+    for h in raw if isinstance(raw, list) else []:
+        tradingsymbols = h.get("tradingsymbol")
+        if not isinstance(tradingsymbols, list):
+            continue
+        for ts in tradingsymbols:
+            if ts.get("exchange", "NSE") != exchange:
+                continue
+            labels["symbol"].append(ts.get("tradingsymbol", "N/A"))
+            labels["isin"].append(ts.get("isin", "N/A"))
+            labels["token"].append(str(ts.get("token", "")))
+            for f, column in numbers.items():
+                column.append(h.get(f))
+    columns = {name: np.array(values, dtype=object) for name, values in labels.items()}
+    columns["exchange"] = np.full(len(labels["token"]), exchange, dtype=object)
+    for f, values in numbers.items():
+        column = to_float_array(values)
+        if f in ("dp_qty", "avg_buy_price", "sell_amt", "trade_qty"):
+            column = np.nan_to_num(column)
+        columns[f] = column
+    return columns
+
+def quote_arrays(columns, quotes):
+    """LTP and previous-close float arrays aligned to `columns` from a token-keyed {token: (ltp, close)} map."""
+    missing = (None, None)
+    pairs = [quotes.get(t, missing) for t in columns["token"]]
+    ltp = np.array([p[0] for p in pairs], dtype=np.float64)
+    close = np.array([p[1] for p in pairs], dtype=np.float64)
+    return ltp, close
+
+def compute_holdings(columns, ltp, prev_close):
+    """
+    Add LTP-derived columns in one vectorized pass. Unknown prices are NaN;
+    P&L on an unknown price counts as 0, and rows with no holding quantity
+    contribute only realized P&L.
+    """
+    ltp = np.asarray(ltp, dtype=np.float64)
+    prev_close = np.asarray(prev_close, dtype=np.float64)
+    avg = columns["avg_buy_price"]
+    trade_qty = columns["trade_qty"]
+    sell_amt = columns["sell_amt"]
+    qty = np.maximum(columns["dp_qty"], 0.0)
+    held = qty > 0
+    exited = (sell_amt > 0) & (trade_qty > 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (ltp - prev_close) / prev_close * 100
+        pct_avg = (ltp - avg) / avg * 100
+        return {
+            **columns,
+            "ltp": ltp,
+            "prev_close": prev_close,
+            "qty": qty,
+            "realized_pnl": np.where(exited, sell_amt - avg * trade_qty, 0.0),
+            "invested": np.where(held, avg * qty, 0.0),
+            "current": np.where(held, np.nan_to_num(ltp) * qty, 0.0),
+            "today_pnl": np.where(held, np.nan_to_num((ltp - prev_close) * qty), 0.0),
+            "overall_pnl": np.where(held, np.nan_to_num((ltp - avg) * qty), 0.0),
+            "pct_change": np.where(held & np.isfinite(pct), pct, np.nan),
+            "pct_change_avg": np.where(held & np.isfinite(pct_avg), pct_avg, np.nan),
+        }
+
+def summarize(columns):
+    realized = columns["realized_pnl"].sum()
+    return {
+        "Today P&L": round(float(columns["today_pnl"].sum() + realized), 2),
+        "Overall P&L": round(float(columns["overall_pnl"].sum() + realized), 2),
+        "Total Invested": round(float(columns["invested"].sum()), 2),
+        "Total Current": round(float(columns["current"].sum()), 2),
+    }
+
+def display_frame(columns):
+    """DataFrame with display headers; values stay numeric so sorting works and formatting is left to the table."""
+    out = {label: columns[name] for label, name in DISPLAY_COLUMNS.items()}
+    out["Qty"] = out["Qty"].astype(np.int64)
+    out["Trade Qty"] = out["Trade Qty"].astype(np.int64)
+    return pd.DataFrame(out)
@@ -0,0 +1,181 @@
+import os
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import requests
+
+from close_cache import DEFAULT_CACHE_DIR
+
+MASTER_URL = "https://app.definedgesecurities.com/public/allmaster.zip"
+
+# allmaster.csv has no header row; columns in file order
+COLUMNS = [
+    "segment", "token", "symbol", "tradingsymbol", "instrument_type", "expiry",
+    "tick_size", "lot_size", "option_type", "strike", "price_precision",
+    "multiplier", "isin", "price_multiplier", "company",
+]
+
+Instrument = namedtuple(
+    "Instrument",
+    ["segment", "token", "symbol", "tradingsymbol", "instrument_type", "expiry",
+     "tick_size", "lot_size", "option_type", "strike", "isin", "company"],
+)
+
+def download_master(cache_dir=None, max_age_hours=12, url=MASTER_URL):
+    """
+    Return a local path to the master zip, downloading it into cache_dir
+    when there is no copy younger than max_age_hours.
+    """
+    cache_dir = cache_dir or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    path = os.path.join(cache_dir, os.path.basename(url))
+    if os.path.exists(path) and time.time() - os.path.getmtime(path) < max_age_hours * 3600:
+        return path
+    tmp = path + ".part"
+    with requests.get(url, stream=True, timeout=(5, 60)) as resp:
+        resp.raise_for_status()
+        with open(tmp, "wb") as f:
+            for chunk in resp.iter_content(1 << 20):
+                f.write(chunk)
+    os.replace(tmp, path)
+    return path
+
+def _fixed_bytes(values):
+    # Fixed-width byte strings: one contiguous buffer instead of a PyObject per cell
+    values = values.to_numpy(dtype=object)
+    try:
+        return values.astype("S")
+    except UnicodeEncodeError:
+        return np.char.encode(values.astype(str), "utf-8")
+
+class InstrumentMaster:
+    """
+    The broker instrument master held as column arrays (fixed-width byte
+    strings, categorical codes and numeric arrays) plus hash indexes mapping
+    (exchange, tradingsymbol), (exchange, token) and ISIN to row numbers.
+    """
+
+    def __init__(self, frame):
+        n = len(frame)
+        segments = pd.Categorical(frame["segment"].str.upper())
+        self.segment_names = np.asarray(segments.categories, dtype=object)
+        self.segment_codes = segments.codes.astype(np.int8)
+        itypes = pd.Categorical(frame["instrument_type"])
+        self.instrument_type_names = np.asarray(itypes.categories, dtype=object)
+        self.instrument_type_codes = itypes.codes.astype(np.int16)
+
+        self.token = _fixed_bytes(frame["token"])
+        self.symbol = _fixed_bytes(frame["symbol"])
+        self.tradingsymbol = _fixed_bytes(frame["tradingsymbol"].str.upper())
+        self.expiry = _fixed_bytes(frame["expiry"])
+        self.option_type = _fixed_bytes(frame["option_type"])
+        self.isin = _fixed_bytes(frame["isin"].str.upper())
+        self.company = _fixed_bytes(frame["company"])
+        # TICKSIZE is published in units of 10**-PRICEPREC (5 at precision 2 is 0.05);
+        # values that already carry a decimal point are taken as rupees.
+        precision = pd.to_numeric(frame["price_precision"], errors="coerce").fillna(2)
+        raw_tick = pd.to_numeric(frame["tick_size"], errors="coerce")
+        scaled = ~frame["tick_size"].str.contains(".", regex=False)
+        self.tick_size = raw_tick.where(~scaled, raw_tick / 10.0 ** precision).to_numpy(np.float64)
+        self.lot_size = pd.to_numeric(frame["lot_size"], errors="coerce").fillna(1).to_numpy(np.int32)
+        self.strike = pd.to_numeric(frame["strike"], errors="coerce").to_numpy(np.float64)
+
+        # Indexes are keyed by single "EXCHANGE|VALUE" strings rather than tuples to
+        # save an object per entry; an ISIN maps to a row, or a tuple of rows when
+        # it is listed on several exchanges.
+        seg = pd.Series(self.segment_names[self.segment_codes], index=frame.index) + "|"
+        rows = range(n)
+        self._by_symbol = dict(zip((seg + frame["tradingsymbol"].str.upper()).to_numpy(dtype=object), rows))
+        self._by_token = dict(zip((seg + frame["token"]).to_numpy(dtype=object), rows))
+        self._by_isin = {}
+        for isin, row in zip(frame["isin"].str.upper().to_numpy(dtype=object), rows):
+            if not isin:
+                continue
+            seen = self._by_isin.get(isin)
+            if seen is None:
+                self._by_isin[isin] = row
+            else:
+                self._by_isin[isin] = (seen if isinstance(seen, tuple) else (seen,)) + (row,)
+        self.load_seconds = None
+
+    @classmethod
+    def load(cls, path=None, cache_dir=None, max_age_hours=12):
+        """
+        Load from a local csv/zip path, or from the cached download of
+        MASTER_URL when no path is given. Records load_seconds.
+        """
+        start = time.perf_counter()
+        path = path or download_master(cache_dir, max_age_hours)
+        frame = pd.read_csv(
+            path, header=None, names=COLUMNS, usecols=range(len(COLUMNS)),
+            dtype=str, keep_default_na=False, na_filter=False,
+        )
+        master = cls(frame)
+        master.load_seconds = time.perf_counter() - start
+        return master
+
+    def __len__(self):
+        return len(self.token)
+
+    def row(self, i):
+        return Instrument(
+            segment=self.segment_names[self.segment_codes[i]],
+            token=self.token[i].decode(),
+            symbol=self.symbol[i].decode(),
+            tradingsymbol=self.tradingsymbol[i].decode(),
+            instrument_type=self.instrument_type_names[self.instrument_type_codes[i]],
+            expiry=self.expiry[i].decode(),
+            tick_size=float(self.tick_size[i]),
+            lot_size=int(self.lot_size[i]),
+            option_type=self.option_type[i].decode(),
+            strike=float(self.strike[i]),
+            isin=self.isin[i].decode(),
+            company=self.company[i].decode(),
+        )
+
+    def by_symbol(self, exchange, tradingsymbol):
+        i = self._by_symbol.get(f"{exchange}|{tradingsymbol}".upper())
+        return None if i is None else self.row(i)
+
+    def by_token(self, exchange, token):
+        i = self._by_token.get(f"{str(exchange).upper()}|{token}")
+        return None if i is None else self.row(i)
+
+    def by_isin(self, isin):
+        rows = self._by_isin.get(str(isin).upper(), ())
+        return [self.row(i) for i in (rows if isinstance(rows, tuple) else (rows,))]
+
+    def token_for(self, exchange, tradingsymbol):
+        inst = self.by_symbol(exchange, tradingsymbol)
+        return inst.token if inst else None
+
+    def memory_bytes(self):
+        """Approximate resident size: column buffers plus the three index dicts and their keys."""
+        arrays = sum(v.nbytes for v in vars(self).values() if isinstance(v, np.ndarray))
+        index = 0
+        for d in (self._by_symbol, self._by_token, self._by_isin):
+            index += sys.getsizeof(d) + sum(sys.getsizeof(k) for k in d)
+        # Row numbers above 256 are separate int objects
+        index += 28 * (len(self._by_symbol) + len(self._by_token) + len(self._by_isin))
+        return arrays + index
+
+if __name__ == "__main__":
+    import argparse
+    import resource
+
+    parser = argparse.ArgumentParser(description="Load the instrument master and report load time and memory.")
+    parser.add_argument("path", nargs="?", help="local allmaster csv/zip (downloads and caches MASTER_URL if omitted)")
+    args = parser.parse_args()
+
+    path = args.path or download_master()
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    master = InstrumentMaster.load(path)
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"rows: {len(master):,}")
+    print(f"load: {master.load_seconds:.2f} s")
+    print(f"resident (arrays + indexes): {master.memory_bytes() / 2**20:.1f} MiB")
+    # ru_maxrss is KiB on Linux
+    print(f"peak RSS growth during load: {(after - before) / 1024:.1f} MiB")
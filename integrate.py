@@ -1,7 +1,13 @@
+import time
+
 import requests
+from requests.adapters import HTTPAdapter
+
+from rate_limit import RateLimiter
 
 class ConnectToIntegrate:
     BASE_URL = "https://integrate.definedgesecurities.com/dart/v1"
+    DATA_URL = "https://data.definedgesecurities.com/sds"
 
     # Useful constants for order types, exchanges, etc.
     EXCHANGE_TYPE_NSE = "NSE"
@@ -13,7 +19,17 @@ class ConnectToIntegrate:
     PRODUCT_TYPE_CNC = "CNC"
     PRODUCT_TYPE_MIS = "MIS"
 
-    def __init__(self):
+    # Transient broker/gateway failures worth retrying on idempotent requests
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    # Path prefixes of order mutations; they get first claim on the rate limit.
+    # GTT/OCO paths are listed in full: "/gtt" alone would also match the /gttorders book.
+    ORDER_PATHS = (
+        "/placeorder", "/modify", "/cancel",
+        "/gttplace", "/gttmodify", "/gttcancel", "/ocoplace", "/ocomodify", "/ococancel",
+    )
+
+    def __init__(self, pool_size=10, connect_timeout=5, read_timeout=15, max_retries=2, backoff=0.3, rate_limits=None):
         self.api_token = None
         self.api_secret = None
         self.uid = None
@@ -21,6 +37,21 @@ class ConnectToIntegrate:
         self.api_session_key = None
         self.ws_session_key = None
 
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        # One keep-alive pool shared by every IntegrateOrders call on this connection.
+        # Retries are handled in request() so non-idempotent calls are never replayed.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # Shared by every thread using this connection; see rate_limit.DEFAULT_LIMITS
+        self.limiter = RateLimiter(rate_limits)
+
     def login(self, api_token, api_secret):
         self.api_token = api_token
         self.api_secret = api_secret
@@ -44,45 +75,117 @@ class ConnectToIntegrate:
             base["Authorization"] = self.api_session_key
         return base
 
+    def endpoint_group(self, url):
+        """Rate-limit group for a URL: orders, books, quotes or history."""
+        if url.startswith(self.DATA_URL):
+            return "history"
+        path = url[len(self.BASE_URL):] if url.startswith(self.BASE_URL) else url
+        if path.startswith("/quotes"):
+            return "quotes"
+        if path.startswith(self.ORDER_PATHS):
+            return "orders"
+        return "books"
+
+    def request(self, method, url, retry=False, **kwargs):
+        """
+        Send a request through the pooled session with the connection's timeouts.
+        Only pass retry=True for idempotent calls: those are retried with
+        exponential backoff on connection errors, timeouts and RETRY_STATUSES.
+        Every attempt, retries included, first takes a token from the rate
+        limiter for the URL's endpoint group.
+        """
+        kwargs.setdefault("headers", self.headers)
+        kwargs.setdefault("timeout", self.timeout)
+        group = self.endpoint_group(url)
+        attempts = self.max_retries + 1 if retry else 1
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            self.limiter.acquire(group)
+            try:
+                resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if last or resp.status_code not in self.RETRY_STATUSES:
+                    return resp
+                resp.close()
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def close(self):
+        self.session.close()
+
 class IntegrateOrders:
     def __init__(self, conn):
         self.conn = conn
 
-    def holdings(self):
-        url = f"{self.conn.BASE_URL}/holdings"
-        resp = requests.get(url, headers=self.conn.headers)
+    def _get(self, path, retry=True):
+        resp = self.conn.request("GET", f"{self.conn.BASE_URL}{path}", retry=retry)
         resp.raise_for_status()
         return resp.json()
 
-    def positions(self):
-        url = f"{self.conn.BASE_URL}/positions"
-        resp = requests.get(url, headers=self.conn.headers)
+    def _post(self, path, data, headers=None):
+        kwargs = {"json": data}
+        if headers:
+            kwargs["headers"] = headers
+        resp = self.conn.request("POST", f"{self.conn.BASE_URL}{path}", **kwargs)
         resp.raise_for_status()
         return resp.json()
 
+    def holdings(self):
+        return self._get("/holdings")
+
+    def positions(self):
+        return self._get("/positions")
+
     def orders(self):
-        url = f"{self.conn.BASE_URL}/orders"
-        resp = requests.get(url, headers=self.conn.headers)
-        resp.raise_for_status()
-        return resp.json()
+        return self._get("/orders")
 
     def gtt_orders(self):
-        url = f"{self.conn.BASE_URL}/gttorders"
-        resp = requests.get(url, headers=self.conn.headers)
-        resp.raise_for_status()
-        return resp.json()
+        return self._get("/gttorders")
 
     def trade_book(self):
         """
         Return the trade book. Uses '/trades' endpoint (not '/tradebook')!
         """
-        url = f"{self.conn.BASE_URL}/trades"
-        resp = requests.get(url, headers=self.conn.headers)
+        return self._get("/trades")
+
+    def quotes(self, exchange, token):
+        return self._get(f"/quotes/{exchange}/{token}")
+
+    def history(self, segment, token, timeframe, from_time, to_time):
+        """
+        Raw CSV bars from the history service; from_time/to_time are 'ddmmyyyyHHMM'.
+        """
+        url = f"{self.conn.DATA_URL}/history/{segment}/{token}/{timeframe}/{from_time}/{to_time}"
+        resp = self.conn.request("GET", url, headers={"Authorization": self.conn.api_session_key}, retry=True)
         resp.raise_for_status()
-        return resp.json()
+        return resp.text
+
+    def history_stream(self, segment, token, timeframe, from_time, to_time):
+        """
+        Like history(), but returns the open streaming response so the body
+        can be parsed as it arrives (history_parser.parse_history(resp.raw)).
+        Use it as a context manager so the connection goes back to the pool.
+        """
+        url = f"{self.conn.DATA_URL}/history/{segment}/{token}/{timeframe}/{from_time}/{to_time}"
+        resp = self.conn.request("GET", url, headers={"Authorization": self.conn.api_session_key}, retry=True, stream=True)
+        try:
+            resp.raise_for_status()
+        except Exception:
+            resp.close()
+            raise
+        resp.raw.decode_content = True
+        return resp
 
-    def place_order(self, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity):
-        url = f"{self.conn.BASE_URL}/placeorder"
+    @staticmethod
+    def _optional(data, **fields):
+        # Optional order fields are sent only when given
+        data.update((k, v) for k, v in fields.items() if v is not None)
+        return data
+
+    def place_order(self, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity,
+                    validity=None, disclosed_quantity=None, remarks=None, trigger_price=None):
         data = {
             "tradingsymbol": tradingsymbol,
             "exchange": exchange,
@@ -92,12 +195,11 @@ class IntegrateOrders:
             "product_type": product_type,
             "quantity": quantity,
         }
-        resp = requests.post(url, headers=self.conn.headers, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        self._optional(data, validity=validity, disclosed_quantity=disclosed_quantity, remarks=remarks, trigger_price=trigger_price)
+        return self._post("/placeorder", data)
 
-    def modify_order(self, order_id, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity):
-        url = f"{self.conn.BASE_URL}/modify"
+    def modify_order(self, order_id, tradingsymbol, exchange, order_type, price, price_type, product_type, quantity,
+                     validity=None, disclosed_quantity=None, remarks=None, trigger_price=None):
         data = {
             "order_id": order_id,
             "tradingsymbol": tradingsymbol,
@@ -108,12 +210,10 @@ class IntegrateOrders:
             "product_type": product_type,
             "quantity": quantity,
         }
-        resp = requests.post(url, headers=self.conn.headers, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        self._optional(data, validity=validity, disclosed_quantity=disclosed_quantity, remarks=remarks, trigger_price=trigger_price)
+        return self._post("/modify", data)
 
     def place_gtt_order(self, tradingsymbol, exchange, order_type, quantity, alert_price, price, condition):
-        url = f"{self.conn.BASE_URL}/gttplace"
         data = {
             "tradingsymbol": tradingsymbol,
             "exchange": exchange,
@@ -123,12 +223,9 @@ class IntegrateOrders:
             "price": price,
             "condition": condition,
         }
-        resp = requests.post(url, headers=self.conn.headers, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        return self._post("/gttplace", data)
 
     def place_oco_order(self, tradingsymbol, exchange, order_type, target_quantity, stoploss_quantity, target_price, stoploss_price, remarks):
-        url = f"{self.conn.BASE_URL}/ocoplace"
         data = {
             "tradingsymbol": tradingsymbol,
             "exchange": exchange,
@@ -139,31 +236,21 @@ class IntegrateOrders:
             "stoploss_price": stoploss_price,
             "remarks": remarks,
         }
-        resp = requests.post(url, headers=self.conn.headers, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        return self._post("/ocoplace", data)
+
+    def cancel_order(self, order_id):
+        return self._get(f"/cancel/{order_id}", retry=False)
 
     # --- Optional: Add GTT Modify/Cancel/OCO Modify/Cancel methods if required ---
     def modify_gtt_order(self, data):
-        url = f"{self.conn.BASE_URL}/gttmodify"
-        resp = requests.post(url, headers={**self.conn.headers, "Content-Type": "application/json"}, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        return self._post("/gttmodify", data, headers={**self.conn.headers, "Content-Type": "application/json"})
 
     def modify_oco_order(self, data):
-        url = f"{self.conn.BASE_URL}/ocomodify"
-        resp = requests.post(url, headers={**self.conn.headers, "Content-Type": "application/json"}, json=data)
-        resp.raise_for_status()
-        return resp.json()
+        return self._post("/ocomodify", data, headers={**self.conn.headers, "Content-Type": "application/json"})
 
+    # Cancels are GETs on the broker side but must never be replayed
     def cancel_gtt_order(self, alert_id):
-        url = f"{self.conn.BASE_URL}/gttcancel/{alert_id}"
-        resp = requests.get(url, headers=self.conn.headers)
-        resp.raise_for_status()
-        return resp.json()
+        return self._get(f"/gttcancel/{alert_id}", retry=False)
 
     def cancel_oco_order(self, alert_id):
-        url = f"{self.conn.BASE_URL}/ococancel/{alert_id}"
-        resp = requests.get(url, headers=self.conn.headers)
-        resp.raise_for_status()
-        return resp.json()
+        return self._get(f"/ococancel/{alert_id}", retry=False)
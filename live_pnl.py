@@ -0,0 +1,143 @@
+import math
+import threading
+
+import numpy as np
+
+from holdings_engine import compute_holdings
+
+class IncrementalPortfolio:
+    """
+    Holdings P&L kept up to date one price at a time.
+
+    Built once from holdings_engine columns (parse_holdings output) and
+    starting prices, it holds the per-row state as Python lists and the
+    four summary totals as running sums. update_price() touches only the
+    rows for one token and adjusts the totals by the difference, so each
+    tick is O(1) regardless of portfolio size. Changed rows are collected
+    until drain_changes(), letting a view redraw just those rows.
+
+    Rows are keyed by (exchange, token): the shared feed also streams F&O,
+    currency and GTT instruments whose token numbers can collide with a
+    holding's, so a tick only lands on rows of its own segment.
+
+    Thread-safe: MarketFeed listeners call in from the feed thread while a
+    page reads summary() and columns() from its own.
+    """
+
+    def __init__(self, columns, ltp, prev_close):
+        full = compute_holdings(columns, ltp, prev_close)
+        self._columns = columns
+        self._lock = threading.Lock()
+        self.tokens = [str(t) for t in columns["token"]]
+        exchanges = [str(e) for e in columns.get("exchange", ["NSE"] * len(self.tokens))]
+        # Token-keyed price maps (quote_arrays) are for the holdings' own exchange
+        self.exchange = exchanges[0] if exchanges else "NSE"
+        self._rows = {}
+        for i, key in enumerate(zip(exchanges, self.tokens)):
+            self._rows.setdefault(key, []).append(i)
+
+        # Price-independent inputs
+        self._qty = full["qty"].tolist()
+        self._avg = full["avg_buy_price"].tolist()
+        self._held = (full["qty"] > 0).tolist()
+        # Price-dependent state
+        self._ltp = full["ltp"].tolist()
+        self._prev_close = full["prev_close"].tolist()
+        self._today = full["today_pnl"].tolist()
+        self._overall = full["overall_pnl"].tolist()
+        self._current = full["current"].tolist()
+        self._realized_total = float(full["realized_pnl"].sum())
+        self._invested_total = float(full["invested"].sum())
+
+        self._changed = set()
+        self.updates = 0
+        self.resync()
+
+    def __len__(self):
+        return len(self.tokens)
+
+    def resync(self):
+        """Recompute the running totals exactly, discarding accumulated float drift."""
+        with self._lock:
+            self._today_total = math.fsum(self._today)
+            self._overall_total = math.fsum(self._overall)
+            self._current_total = math.fsum(self._current)
+
+    def update_price(self, token, ltp, prev_close=None, exchange=None):
+        """
+        Apply one price (and optionally a new previous close) for `token` on
+        `exchange` (default: the holdings' exchange). Returns the row
+        numbers that changed; unknown instruments and unchanged prices
+        return an empty list.
+        """
+        rows = self._rows.get((str(exchange or self.exchange), str(token)))
+        if not rows or ltp is None:
+            return []
+        ltp = float(ltp)
+        changed = []
+        with self._lock:
+            for i in rows:
+                close = self._prev_close[i] if prev_close is None else float(prev_close)
+                if ltp == self._ltp[i] and close == self._prev_close[i]:
+                    continue
+                self._ltp[i] = ltp
+                self._prev_close[i] = close
+                if self._held[i]:
+                    qty = self._qty[i]
+                    # Same rules as compute_holdings: an unknown price contributes 0
+                    today = _finite((ltp - close) * qty)
+                    overall = _finite((ltp - self._avg[i]) * qty)
+                    current = _finite(ltp * qty)
+                    self._today_total += today - self._today[i]
+                    self._overall_total += overall - self._overall[i]
+                    self._current_total += current - self._current[i]
+                    self._today[i], self._overall[i], self._current[i] = today, overall, current
+                changed.append(i)
+            self._changed.update(changed)
+            self.updates += 1
+        return changed
+
+    def update_prices(self, prices):
+        """Apply {token: ltp} or {token: (ltp, prev_close)}; returns the changed rows."""
+        changed = []
+        for token, price in prices.items():
+            if isinstance(price, tuple):
+                changed += self.update_price(token, *price)
+            else:
+                changed += self.update_price(token, price)
+        return changed
+
+    def on_tick(self, segment, token, tick):
+        """MarketFeed listener: feed ticks straight into the model."""
+        self.update_price(token, tick.ltp, tick.close, exchange=segment)
+
+    def drain_changes(self):
+        """Rows changed since the last drain, in row order."""
+        with self._lock:
+            changed, self._changed = sorted(self._changed), set()
+        return changed
+
+    def summary(self):
+        """Same keys and rounding as holdings_engine.summarize, read from the running totals."""
+        with self._lock:
+            return {
+                "Today P&L": round(self._today_total + self._realized_total, 2),
+                "Overall P&L": round(self._overall_total + self._realized_total, 2),
+                "Total Invested": round(self._invested_total, 2),
+                "Total Current": round(self._current_total, 2),
+            }
+
+    def columns(self, rows=None):
+        """Full compute_holdings columns at current prices (only `rows` if given), for display_frame."""
+        with self._lock:
+            ltp = np.array(self._ltp, dtype=np.float64)
+            prev_close = np.array(self._prev_close, dtype=np.float64)
+        columns = self._columns
+        if rows is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+            columns = {name: values[rows] for name, values in columns.items()}
+            ltp, prev_close = ltp[rows], prev_close[rows]
+        return compute_holdings(columns, ltp, prev_close)
+
+def _finite(value):
+    return value if math.isfinite(value) else 0.0
@@ -0,0 +1,223 @@
+import asyncio
+import json
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+
+import websockets
+
+WS_URL = "wss://trade.definedgesecurities.com/NorenWSTRTP/"
+
+@dataclass
+class Tick:
+    ltp: float = None
+    close: float = None
+    received_at: float = 0.0
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class MarketFeed:
+    """
+    Touchline subscriber on the broker websocket, authenticated with
+    ws_session_key. Runs its own asyncio loop on a daemon thread and keeps
+    the last tick per (segment, token) in memory, so pages can read prices
+    without an HTTP call. Reconnects with backoff and resubscribes on its own.
+
+    Order updates for the account ride the same connection: once an order
+    listener is added, the feed subscribes to them (and resubscribes after
+    every reconnect) and hands each "om" message to the listeners.
+    """
+
+    def __init__(self, uid, actid, ws_session_key, url=WS_URL, heartbeat=50, max_backoff=30):
+        self.uid = uid
+        self.actid = actid
+        self.ws_session_key = ws_session_key
+        self.url = url
+        self.heartbeat = heartbeat
+        self.max_backoff = max_backoff
+
+        self.ticks = {}
+        self.connected = False
+        self.last_message_at = 0.0
+        self.last_error = None
+
+        self._subscribed = set()
+        self._listeners = []
+        self._order_listeners = []
+        self._lock = threading.Lock()
+        self._loop = None
+        self._ws = None
+        self._thread = None
+        self._stopping = False
+
+    # --- Public, thread-safe API ---
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        self._stopping = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),), name="market-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        if self._loop and self._ws is not None:
+            asyncio.run_coroutine_threadsafe(self._ws.close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def subscribe(self, instruments):
+        """Subscribe to (segment, token) pairs; already-subscribed pairs are ignored."""
+        with self._lock:
+            new = {(str(seg), str(tok)) for seg, tok in instruments} - self._subscribed
+            self._subscribed |= new
+        if new:
+            self._send_threadsafe({"t": "t", "k": self._keys(new)})
+
+    def unsubscribe(self, instruments):
+        with self._lock:
+            gone = {(str(seg), str(tok)) for seg, tok in instruments} & self._subscribed
+            self._subscribed -= gone
+        if gone:
+            self._send_threadsafe({"t": "u", "k": self._keys(gone)})
+            for key in gone:
+                self.ticks.pop(key, None)
+
+    def add_listener(self, callback):
+        """
+        Call callback(segment, token, tick) on the feed thread for every tick;
+        keep it cheap. Bound methods are held weakly, so a listener object
+        dropped with its Streamlit session stops receiving ticks on its own.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, "__self__") else (lambda: callback)
+        with self._lock:
+            self._listeners = self._listeners + [ref]
+
+    def remove_listener(self, callback):
+        with self._lock:
+            self._listeners = [ref for ref in self._listeners if ref() not in (None, callback)]
+
+    def add_order_listener(self, callback):
+        """Call callback(message) on the feed thread for every order update message."""
+        with self._lock:
+            first = not self._order_listeners
+            self._order_listeners = self._order_listeners + [callback]
+        if first:
+            self._send_threadsafe(self._order_subscription())
+
+    def tick(self, segment, token):
+        return self.ticks.get((str(segment), str(token)))
+
+    def ltp(self, segment, token):
+        """Last streamed price, or None while disconnected so callers fall back to /quotes."""
+        if not self.connected:
+            return None
+        tick = self.tick(segment, token)
+        return tick.ltp if tick else None
+
+    # --- Internals ---
+    def _order_subscription(self):
+        return {"t": "o", "actid": self.actid}
+
+    @staticmethod
+    def _keys(instruments):
+        return "#".join(f"{seg}|{tok}" for seg, tok in sorted(instruments))
+
+    def _send_threadsafe(self, message):
+        ws = self._ws
+        if self._loop is None or ws is None or not self.connected:
+            # Sent on (re)connect from the subscription set
+            return
+        asyncio.run_coroutine_threadsafe(ws.send(json.dumps(message)), self._loop)
+
+    async def _run(self):
+        backoff = 1
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    await self._login(ws)
+                    backoff = 1
+                    heartbeat = asyncio.ensure_future(self._heartbeat(ws))
+                    try:
+                        async for raw in ws:
+                            self._on_message(raw)
+                    finally:
+                        heartbeat.cancel()
+            except Exception as e:
+                self.last_error = str(e)
+            finally:
+                self.connected = False
+                self._ws = None
+            if not self._stopping:
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+
+    async def _login(self, ws):
+        await ws.send(json.dumps({
+            "t": "c",
+            "uid": self.uid,
+            "actid": self.actid,
+            "source": "TRTP",
+            "susertoken": self.ws_session_key,
+        }))
+        ack = json.loads(await ws.recv())
+        if ack.get("t") != "ck" or str(ack.get("s", "")).upper() != "OK":
+            raise ConnectionError(f"Websocket login rejected: {ack}")
+        self.connected = True
+        with self._lock:
+            subscribed = set(self._subscribed)
+        if subscribed:
+            await ws.send(json.dumps({"t": "t", "k": self._keys(subscribed)}))
+        if self._order_listeners:
+            await ws.send(json.dumps(self._order_subscription()))
+
+    async def _heartbeat(self, ws):
+        while True:
+            await asyncio.sleep(self.heartbeat)
+            await ws.send(json.dumps({"t": "h"}))
+
+    def _on_message(self, raw):
+        self.last_message_at = time.time()
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return
+        if msg.get("t") == "om":
+            self._on_order(msg)
+            return
+        # tk = subscription snapshot, tf = incremental touchline update
+        if msg.get("t") not in ("tk", "tf"):
+            return
+        key = (str(msg.get("e")), str(msg.get("tk")))
+        if key not in self._subscribed:
+            return
+        tick = self.ticks.get(key) or Tick()
+        ltp = _float(msg.get("lp"))
+        close = _float(msg.get("c"))
+        tick = self.ticks[key] = Tick(
+            ltp=ltp if ltp is not None else tick.ltp,
+            close=close if close is not None else tick.close,
+            received_at=self.last_message_at,
+        )
+        for ref in self._listeners:
+            callback = ref()
+            if callback is None:
+                continue
+            try:
+                callback(key[0], key[1], tick)
+            except Exception as e:
+                self.last_error = f"listener {callback!r}: {e}"
+
+    def _on_order(self, msg):
+        for callback in self._order_listeners:
+            try:
+                callback(msg)
+            except Exception as e:
+                self.last_error = f"order listener {callback!r}: {e}"
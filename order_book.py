@@ -0,0 +1,179 @@
+import threading
+import time
+
+# order_status values by view. The websocket reports some states under
+# Noren names (PENDING, TRIGGER_PENDING, CANCELED), so both spellings appear.
+PENDING_STATUSES = {"NEW", "OPEN", "REPLACED", "PENDING", "TRIGGER_PENDING"}
+FILLED_STATUSES = {"COMPLETE", "FILLED"}
+REJECTED_STATUSES = {"REJECTED"}
+CANCELLED_STATUSES = {"CANCELED", "CANCELLED"}
+
+# Websocket "om" field -> /orders field
+STREAM_FIELDS = {
+    "norenordno": "order_id",
+    "tsym": "tradingsymbol",
+    "exch": "exchange",
+    "trantype": "order_type",
+    "prctyp": "price_type",
+    "prd": "product_type",
+    "qty": "quantity",
+    "prc": "price",
+    "trgprc": "trigger_price",
+    "fillshares": "filled_qty",
+    "avgprc": "average_traded_price",
+    "status": "order_status",
+    "rejreason": "message",
+    "remarks": "remarks",
+    "token": "token",
+}
+
+# Short codes the stream uses where /orders spells the value out
+STREAM_VALUES = {
+    "order_type": {"B": "BUY", "S": "SELL"},
+    "price_type": {"LMT": "LIMIT", "MKT": "MARKET", "SL-LMT": "SL-LIMIT", "SL-MKT": "SL-MARKET"},
+    "product_type": {"C": "CNC", "I": "INTRADAY", "M": "NORMAL"},
+}
+
+def _qty(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def stream_update(msg):
+    """Translate a websocket order message into an /orders-shaped partial row."""
+    row = {}
+    for src, dst in STREAM_FIELDS.items():
+        if msg.get(src) not in (None, ""):
+            value = msg[src]
+            row[dst] = STREAM_VALUES.get(dst, {}).get(value, value)
+    if "order_status" in row:
+        row["order_status"] = str(row["order_status"]).upper()
+    return row
+
+class LocalOrderBook:
+    """
+    In-memory order book indexed by order_id and by order_status.
+
+    Two sources feed it: apply() merges single order updates from the
+    websocket as they arrive, and load() reconciles against a full /orders
+    payload (the polling fallback, fed from the background refresher).
+    load() only touches rows that differ, and never lets a poll fetched
+    before a streamed update roll that order back. Readers get copies, so
+    pages can filter and display without a lock or an HTTP call.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._orders = {}     # order_id -> row
+        self._by_status = {}  # order_status -> set of order_ids
+        self._streamed_at = {}  # order_id -> time of the last streamed update
+        self._last_payload = None
+        self.version = 0
+        self.updated_at = None
+        self.stream_updates = 0
+        self.polls = 0
+
+    def __len__(self):
+        return len(self._orders)
+
+    def _index(self, order_id, row):
+        old = self._orders.get(order_id)
+        if old is not None:
+            ids = self._by_status.get(old.get("order_status"))
+            if ids is not None:
+                ids.discard(order_id)
+        if row is None:
+            self._orders.pop(order_id, None)
+            return
+        self._orders[order_id] = row
+        self._by_status.setdefault(row.get("order_status"), set()).add(order_id)
+
+    def _touch(self):
+        self.version += 1
+        self.updated_at = time.time()
+
+    def apply(self, msg):
+        """Merge one websocket order message (t="om"); a MarketFeed order listener."""
+        update = stream_update(msg)
+        order_id = update.get("order_id")
+        if not order_id:
+            return
+        with self._lock:
+            row = {**self._orders.get(order_id, {}), **update}
+            if "quantity" in row and "filled_qty" in row:
+                row["pending_qty"] = str(max(_qty(row["quantity"]) - _qty(row["filled_qty"]), 0))
+            if row.get("order_status") not in PENDING_STATUSES:
+                row["pending_qty"] = "0"
+            self._index(order_id, row)
+            self._streamed_at[order_id] = time.time()
+            self.stream_updates += 1
+            self._touch()
+
+    def load(self, rows, as_of=None):
+        """
+        Reconcile with a full /orders row list fetched at `as_of` (epoch
+        seconds). Returns the number of rows added, changed or removed.
+        """
+        as_of = time.time() if as_of is None else as_of
+        changed = 0
+        with self._lock:
+            self.polls += 1
+            seen = set()
+            for row in rows:
+                order_id = row.get("order_id")
+                if not order_id:
+                    continue
+                seen.add(order_id)
+                if self._streamed_at.get(order_id, 0) > as_of:
+                    continue
+                if self._orders.get(order_id) != row:
+                    self._index(order_id, dict(row))
+                    changed += 1
+            for order_id in set(self._orders) - seen:
+                if self._streamed_at.get(order_id, 0) <= as_of:
+                    self._index(order_id, None)
+                    changed += 1
+            if changed:
+                self._touch()
+        return changed
+
+    def load_fetch(self, fetch):
+        """
+        Reconcile with a snapshot.BookFetch of the orders book. A failed
+        fetch, or the same payload object again (a cache hit), is a no-op.
+        The poll counts as of when its request was sent: a stream update
+        that arrived while it was in flight may be newer than the response.
+        """
+        if not fetch.ok or fetch.data is self._last_payload:
+            return 0
+        self._last_payload = fetch.data
+        return self.load(fetch.rows, (fetch.requested_at or fetch.fetched_at).timestamp())
+
+    # --- Views ---
+    def get(self, order_id):
+        with self._lock:
+            row = self._orders.get(order_id)
+            return dict(row) if row else None
+
+    def rows(self):
+        with self._lock:
+            return [dict(row) for row in self._orders.values()]
+
+    def with_status(self, statuses):
+        with self._lock:
+            ids = set().union(*(self._by_status.get(s, ()) for s in statuses))
+            return [dict(self._orders[i]) for i in sorted(ids)]
+
+    def pending(self):
+        """Working orders with quantity left, the same rule as basket.filter_pending_orders."""
+        return [o for o in self.with_status(PENDING_STATUSES) if _qty(o.get("pending_qty", 0)) > 0]
+
+    def filled(self):
+        return self.with_status(FILLED_STATUSES)
+
+    def rejected(self):
+        return self.with_status(REJECTED_STATUSES)
+
+    def cancelled(self):
+        return self.with_status(CANCELLED_STATUSES)
@@ -1,261 +1,152 @@
-import streamlit as st
-import pandas as pd
-from integrate import ConnectToIntegrate, IntegrateOrders
-import requests
+import json
 from datetime import datetime, timedelta
 
-# --- Load secrets
-api_token = st.secrets["integrate_api_token"]
-api_secret = st.secrets["integrate_api_secret"]
-uid = st.secrets["integrate_uid"]
-actid = st.secrets["integrate_actid"]
-api_session_key = st.secrets["integrate_api_session_key"]
-ws_session_key = st.secrets["integrate_ws_session_key"]
-
-conn = ConnectToIntegrate()
-conn.login(api_token, api_secret)
-conn.set_session_keys(uid, actid, api_session_key, ws_session_key)
-io = IntegrateOrders(conn)
-
-def get_definedge_ltp_and_yclose(segment, token, session_key, max_days_lookback=10):
-    headers = {'Authorization': session_key}
-    ltp = None
-    try:
-        url = f"https://integrate.definedgesecurities.com/dart/v1/quotes/{segment}/{token}"
-        response = requests.get(url, headers=headers, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            ltp = float(data.get('ltp')) if data.get('ltp') not in (None, "null", "") else None
-    except Exception:
-        pass
-
-    yclose = None
-    closes = []
-    for offset in range(1, max_days_lookback+1):
-        dt = datetime.now() - timedelta(days=offset-1)
-        date_str = dt.strftime('%d%m%Y')
-        from_time = f"{date_str}0000"
-        to_time = f"{date_str}1530"
-        url = f"https://data.definedgesecurities.com/sds/history/{segment}/{token}/day/{from_time}/{to_time}"
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            if response.status_code == 200:
-                lines = response.text.strip().splitlines()
-                for line in lines:
-                    fields = line.split(',')
-                    if len(fields) >= 5:
-                        closes.append(float(fields[4]))
-                if len(closes) >= 2:
-                    break
-        except Exception:
-            pass
-        if len(closes) >= 2:
-            break
-    closes = list(dict.fromkeys(closes))
-    if len(closes) >= 2:
-        yclose = closes[-2]
-    return ltp, yclose
-
-def build_master_mapping_from_holdings(holdings_book):
-    mapping = {}
-    raw = holdings_book.get('data', [])
-    if not isinstance(raw, list):
-        return mapping
-    for h in raw:
-        tradingsymbols = h.get("tradingsymbol")
-        if isinstance(tradingsymbols, list):
-            for ts in tradingsymbols:
-                exch = ts.get("exchange", "NSE")
-                tsym = ts.get("tradingsymbol", "")
-                token = ts.get("token", "")
-                if exch and tsym and token:
-                    mapping[(exch, tsym)] = {'segment': exch, 'token': token}
-    return mapping
-
-def holdings_tabular(holdings_book, master_mapping, session_key):
-    raw = holdings_book.get('data', [])
-    table = []
-    total_today_pnl = 0
-    total_overall_pnl = 0
-    total_invested = 0
-    total_current = 0
-    total_realized_today = 0
-    total_realized_overall = 0
-
-    headers = [
-        "Symbol", "LTP", "Avg Buy", "Qty", "P.Close", "%Chg", "Today P&L", "Overall P&L",
-        "Realized P&L", "%Chg Avg", "Invested", "Current", "Exchange", "ISIN", "T1", "Haircut", "Coll Qty", "Sell Amt", "Trade Qty"
-    ]
-
-    for h in raw:
-        dp_qty = float(h.get("dp_qty", 0) or 0)
-        avg_buy_price = float(h.get("avg_buy_price", 0) or 0)
-        t1_qty = h.get("t1_qty", "N/A")
-        haircut = h.get("haircut", "N/A")
-        collateral_qty = h.get("collateral_qty", "N/A")
-        sell_amt = float(h.get("sell_amt", 0) or 0)
-        trade_qty = float(h.get("trade_qty", 0) or 0)
-        tradingsymbols = h.get("tradingsymbol")
-        realized_pnl = 0.0
-
-        if isinstance(tradingsymbols, list) and tradingsymbols:
-            for ts in tradingsymbols:
-                exch = ts.get("exchange", "NSE")
-                if exch != "NSE":
-                    continue
-                tsym = ts.get("tradingsymbol", "N/A")
-                isin = ts.get("isin", "N/A")
-                key = (exch, tsym)
-                segment_token = master_mapping.get(key)
-                if not segment_token:
-                    ltp, yest_close = None, None
-                else:
-                    ltp, yest_close = get_definedge_ltp_and_yclose(segment_token['segment'], segment_token['token'], session_key)
-                exited = (sell_amt > 0 and trade_qty > 0)
-                holding_qty = dp_qty if dp_qty > 0 else 0
-                exited_qty = trade_qty if exited else 0
-
-                if exited and exited_qty > 0:
-                    sell_price = sell_amt / exited_qty if exited_qty else 0
-                    realized_pnl = (sell_price - avg_buy_price) * exited_qty
-                    total_realized_today += realized_pnl
-                    total_realized_overall += realized_pnl
-                else:
-                    realized_pnl = 0
-
-                if holding_qty > 0:
-                    invested = avg_buy_price * holding_qty
-                    current = (ltp or 0) * holding_qty if ltp is not None else 0
-                    today_pnl = (ltp - yest_close) * holding_qty if ltp is not None and yest_close is not None else 0
-                    overall_pnl = (ltp - avg_buy_price) * holding_qty if ltp is not None else 0
-                    pct_change = ((ltp - yest_close) / yest_close * 100) if ltp is not None and yest_close not in (None, 0) else "N/A"
-                    pct_change_avg = ((ltp - avg_buy_price) / avg_buy_price * 100) if ltp is not None and avg_buy_price not in (None, 0) else "N/A"
-                else:
-                    invested = 0
-                    current = 0
-                    today_pnl = 0
-                    overall_pnl = 0
-                    pct_change = "N/A"
-                    pct_change_avg = "N/A"
-
-                # Totals only from holding qty (unrealized)
-                total_today_pnl += today_pnl
-                total_overall_pnl += overall_pnl
-                total_invested += invested
-                total_current += current
-
-                # For display: realized P&L as column
-                table.append([
-                    tsym,
-                    f"{ltp:.2f}" if ltp is not None else "N/A",
-                    f"{avg_buy_price:.2f}",
-                    int(holding_qty),
-                    f"{yest_close:.2f}" if yest_close is not None else "N/A",
-                    f"{pct_change:.2f}" if isinstance(pct_change, float) else pct_change,
-                    f"{today_pnl:.2f}" if isinstance(today_pnl, float) else today_pnl,
-                    f"{overall_pnl:.2f}" if isinstance(overall_pnl, float) else overall_pnl,
-                    f"{realized_pnl:.2f}" if realized_pnl else "",
-                    f"{pct_change_avg:.2f}" if isinstance(pct_change_avg, float) else pct_change_avg,
-                    f"{invested:.2f}",
-                    f"{current:.2f}",
-                    exch,
-                    isin,
-                    t1_qty,
-                    haircut,
-                    collateral_qty,
-                    f"{sell_amt:.2f}",
-                    int(trade_qty)
-                ])
-
-    # Add realized P&L from exited qty to totals
-    total_today_pnl += total_realized_today
-    total_overall_pnl += total_realized_overall
-
-    df = pd.DataFrame(table, columns=headers)
-    summary = {
-        "Today P&L": round(total_today_pnl, 2),
-        "Overall P&L": round(total_overall_pnl, 2),
-        "Total Invested": round(total_invested, 2),
-        "Total Current": round(total_current, 2)
-    }
-    return df, summary
+import streamlit as st
+import pandas as pd
+from broker import get_bar_store, get_calendar, get_integrate, get_market_feed, get_refresher, refreshed_state
+from charts import chart_watchlist
+from live_pnl import IncrementalPortfolio
+from holdings_engine import PRICE_COLUMNS, compute_holdings, display_frame, parse_holdings, quote_arrays, summarize
+from positions_engine import parse_positions, positions_frame, summarize_positions
+from quotes import build_master_mapping_from_holdings
+from trading_calendar import IST
+
+io = get_integrate()
+calendar = get_calendar()
+feed = get_market_feed()
+refresher = get_refresher()
+
+def holdings_tabular(holdings_book, quotes):
+    columns = parse_holdings(holdings_book)
+    ltp, prev_close = quote_arrays(columns, quotes)
+    columns = compute_holdings(columns, ltp, prev_close)
+    return display_frame(columns), summarize(columns)
+
+def live_holdings(holdings_book, quotes):
+    """
+    While the market is open and the feed is up, keep one IncrementalPortfolio
+    per session that the websocket updates tick by tick; reruns read its
+    running totals instead of recomputing every row. Each rerun also applies
+    the refresher's latest quotes, which cover tokens with no stream ticks
+    (the refresher reads the feed first, so streamed prices are not undone).
+    """
+    signature = hash(json.dumps(holdings_book, sort_keys=True, default=str))
+    cached = st.session_state.get("live_portfolio")
+    if cached and cached[0] == signature and feed.connected:
+        cached[1].update_prices(quotes)
+        return cached[1]
+    if cached:
+        feed.remove_listener(cached[1].on_tick)
+    columns = parse_holdings(holdings_book)
+    portfolio = IncrementalPortfolio(columns, *quote_arrays(columns, quotes))
+    feed.add_listener(portfolio.on_tick)
+    st.session_state["live_portfolio"] = (signature, portfolio)
+    return portfolio
+
+def holdings_charts(holdings_book):
+    """Renko / P&F state next to each NSE holding, built from bars in the local bar store."""
+    # Dual-listed holdings carry a BSE listing too; chart each once, on NSE
+    mapping = {k: v for k, v in build_master_mapping_from_holdings(holdings_book).items() if k[0] == "NSE"}
+    if not mapping:
+        st.info("No NSE holdings with tokens to chart.")
+        return
+    cols = st.columns(5)
+    timeframe = cols[0].selectbox("Bars", ["day", "minute"], key="chart_timeframe")
+    lookback = cols[1].number_input(
+        "Lookback (days)", min_value=5, max_value=3650, value=365 if timeframe == "day" else 30, step=5,
+        key=f"chart_lookback_{timeframe}",
+    )
+    mode = cols[2].radio("Box", ["Percent", "Fixed"], horizontal=True, key="chart_box_mode")
+    box = cols[3].number_input(
+        "Box size (%)" if mode == "Percent" else "Box size (Rs)", min_value=0.01,
+        value=1.0 if mode == "Percent" else 5.0, step=0.25, key=f"chart_box_{mode}",
+    )
+    reversal = cols[4].number_input("P&F reversal (boxes)", min_value=1, max_value=10, value=3, key="chart_reversal")
+
+    store = get_bar_store()
+    end = datetime.now(IST).date()
+    instruments = {key: (m["segment"], m["token"]) for key, m in mapping.items()}
+    with st.spinner("Loading bars..."):
+        bars = store.fetch_many(io, instruments.values(), timeframe, end - timedelta(days=int(lookback)), end, calendar)
+    frames = {tsym: bars[(str(seg), str(tok))] for (_, tsym), (seg, tok) in instruments.items()}
+    summary, charts = chart_watchlist(frames, box, int(reversal), percent=mode == "Percent")
+    st.dataframe(summary.rename_axis("Symbol"))
+
+    symbol = st.selectbox("Chart detail", sorted(charts), key="chart_symbol")
+    bricks, columns = charts[symbol]
+    left, right = st.columns(2)
+    left.write(f"**Renko bricks ({len(bricks)})**")
+    left.dataframe(bricks.iloc[::-1], hide_index=True)
+    right.write(f"**Point & Figure columns ({len(columns)})**")
+    right.dataframe(columns.iloc[::-1], hide_index=True)
 
 def positions_tabular(positions_book):
-    raw = positions_book.get('positions', [])
-    table = []
-    if not raw or len(raw) == 0:
-        return pd.DataFrame(), pd.DataFrame()
-    headers = list(raw[0].keys())
-    important_cols = [
-        ("tradingsymbol", "Symbol"),
-        ("net_averageprice", "Avg. Buy"),
-        ("net_quantity", "Qty"),
-        ("unrealized_pnl", "Unrealised P&L"),
-        ("realized_pnl", "Realized P&L"),
-        ("percent_change", "% Change"),
-        ("product_type", "Product Type"),
-    ]
-    all_keys = list(raw[0].keys()) if raw else []
-    rest_keys = [k for k in all_keys if k not in [col[0] for col in important_cols]]
-    headers = [col[1] for col in important_cols] + rest_keys
-    total_unrealized = 0.0
-    total_realized = 0.0
-    for p in raw:
-        try:
-            last_price = float(p.get("lastPrice", 0))
-            avg_price = float(p.get("net_averageprice", 0))
-            if avg_price:
-                percent_change = round((last_price - avg_price) / avg_price * 100, 2)
-            else:
-                percent_change = "N/A"
-        except Exception:
-            percent_change = "N/A"
-        row = [p.get(col[0], "") for col in important_cols[:-2]]
-        row.append(percent_change)
-        row.append(p.get("product_type", ""))
-        row += [p.get(k, "") for k in rest_keys]
-        table.append(row)
-        try:
-            total_unrealized += float(p.get("unrealized_pnl", 0) or 0)
-        except Exception:
-            pass
-        try:
-            total_realized += float(p.get("realized_pnl", 0) or 0)
-        except Exception:
-            pass
-
-    summary_table = [
-        ["Total Realized P&L", round(total_realized, 2)],
-        ["Total Unrealized P&L", round(total_unrealized, 2)],
-        ["Total Net P&L", round(total_realized + total_unrealized, 2)]
-    ]
-    df_sum = pd.DataFrame(summary_table, columns=["Summary", "Amount"])
-    df = pd.DataFrame(table, columns=headers)
-    return df_sum, df
+    columns = parse_positions(positions_book)
+    return summarize_positions(columns), positions_frame(columns)
 
 st.set_page_config(page_title="Dashboard", layout="wide")
 st.title("Perfect Holdings / Positions (Live LTP & P&L)")
+if not calendar.is_market_open():
+    st.caption(f"Market closed: showing prices as of the {calendar.current_session():%d %b %Y} session; quotes are not re-polled until the next open.")
+
+# Books and quotes are fetched by the background refresher; this page only renders them
+state = refreshed_state()
+if st.button("Refresh now"):
+    state = refresher.refresh_now()
+snap = state.snapshot
+st.caption(
+    state.describe() + " | "
+    + " | ".join(f"{b.name}: {b.latency * 1000:.0f} ms{' (cached)' if b.cached else ''}" for b in snap.books.values())
+)
+quote_stats = io.stats["quotes"]
+st.caption(
+    f"Shared quote cache: {quote_stats['hits']} hits, {quote_stats['misses']} broker requests, "
+    f"{quote_stats['coalesced']} coalesced"
+)
+with st.expander("Broker API rate limiter"):
+    st.dataframe(pd.DataFrame(io.conn.limiter.metrics()).T)
 
 # Holdings
 st.header("Holdings")
 try:
-    holdings_book = io.holdings()
+    holdings_book = snap["holdings"].result()
     if not holdings_book.get("data"):
         st.info("No holdings found or API returned: " + str(holdings_book))
     else:
-        master_mapping = build_master_mapping_from_holdings(holdings_book)
-        df_hold, summary = holdings_tabular(holdings_book, master_mapping, api_session_key)
+        if calendar.is_market_open():
+            portfolio = live_holdings(holdings_book, state.quotes)
+            df_hold, summary = display_frame(portfolio.columns()), portfolio.summary()
+        else:
+            df_hold, summary = holdings_tabular(holdings_book, state.quotes)
         st.write("**Summary**")
         st.write(summary)
         st.write(f"**Total NSE Holdings: {len(df_hold)}**")
-        st.dataframe(df_hold)
+        st.dataframe(
+            df_hold,
+            column_config={col: st.column_config.NumberColumn(format="%.2f") for col in PRICE_COLUMNS},
+        )
 except Exception as e:
     st.error(f"Failed to get holdings: {e}")
 
+# Charts fetch history, so they are built only on request
+if st.checkbox("Show Renko / Point & Figure for holdings", key="show_charts"):
+    try:
+        holdings_book = snap["holdings"].result()
+        if holdings_book.get("data"):
+            holdings_charts(holdings_book)
+        else:
+            st.info("No holdings to chart.")
+    except Exception as e:
+        st.error(f"Failed to build charts: {e}")
+
 # Positions
 st.header("Positions")
 try:
-    positions_book = io.positions()
+    positions_book = snap["positions"].result()
+    feed.subscribe(
+        (p.get("exchange"), p.get("token")) for p in positions_book.get("positions") or []
+        if p.get("exchange") and p.get("token")
+    )
     if not positions_book.get("positions"):
         st.info("No positions found or API returned: " + str(positions_book))
     else:
@@ -1,130 +1,81 @@
+import time
+
 import streamlit as st
-import requests
 import pandas as pd
+from basket import flatten_holdings, flatten_positions, holdings_exit_payloads, place_basket, positions_exit_payloads, resolve_shortcuts
+from broker import get_integrate, get_market_feed, instrument_token, refreshed_state
+from quotes import fetch_ltps
 
-BASE_URL = "https://integrate.definedgesecurities.com/dart/v1"
-api_session_key = st.secrets["integrate_api_session_key"]
-
-def get_headers():
-    return {"Authorization": api_session_key}
+io = get_integrate()
+feed = get_market_feed()
 
 def fetch_holdings():
-    url = f"{BASE_URL}/holdings"
-    response = requests.get(url, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+    return refreshed_state().snapshot["holdings"].result()
 
 def fetch_positions():
-    url = f"{BASE_URL}/positions"
-    response = requests.get(url, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+    return refreshed_state().snapshot["positions"].result()
 
-def fetch_ltp(exchange, tradingsymbol):
-    # Mapping for symbol to token -- you may want to cache/fetch this mapping from your master
-    symbol_token_map = {
-        "TEXRAIL-EQ": "5489",
-        "SBIN-EQ": "3045",
-        # Add more as needed
-    }
-    token = symbol_token_map.get(tradingsymbol)
+def fetch_ltp(exchange, tradingsymbol, token=None):
+    exg = "NSE" if str(exchange).upper().startswith("N") else "BSE"
+    if token in (None, "", "-"):
+        token = instrument_token(exg, tradingsymbol)
     if not token:
         return "-"
-    exg = "NSE" if str(exchange).upper().startswith("N") else "BSE"
-    url = f"{BASE_URL}/quotes/{exg}/{token}"
+    ltp = feed.ltp(exg, token)
+    if ltp is not None:
+        return ltp
     try:
-        response = requests.get(url, headers=get_headers(), timeout=10)
-        response.raise_for_status()
-        data = response.json()
+        data = io.quotes(exg, token)
         ltp = data.get('ltp', "-")
         return ltp
     except Exception:
         return "-"
 
 def place_sell_order(order_kwargs):
-    url = f"{BASE_URL}/placeorder"
-    response = requests.post(
-        url,
-        headers={**get_headers(), "Content-Type": "application/json"},
-        json=order_kwargs,
-        timeout=15
-    )
-    try:
-        json_resp = response.json()
-    except Exception:
-        json_resp = None
-    return {
-        "status_code": response.status_code,
-        "reason": response.reason,
-        "headers": dict(response.headers),
-        "raw_text": response.text,
-        "json": json_resp
-    }
-
-def flatten_holdings(raw_holdings):
-    flat = []
-    for h in raw_holdings:
-        ts_list = h.get("tradingsymbol", [])
-        for ts in ts_list:
-            if ts.get("exchange") == "NSE":
-                flat.append({
-                    "tradingsymbol": ts.get("tradingsymbol"),
-                    "exchange": ts.get("exchange"),
-                    "isin": ts.get("isin"),
-                    "dp_qty": h.get("dp_qty"),
-                    "avg_buy_price": h.get("avg_buy_price"),
-                    "haircut": h.get("haircut"),
-                    "t1_qty": h.get("t1_qty"),
-                    "holding_used": h.get("holding_used"),
-                    "token": ts.get("token", "-"),
-                })
-    return flat
-
-def flatten_positions(raw_positions):
-    flat = []
-    for p in raw_positions:
-        flat.append({
-            "tradingsymbol": p.get("tradingsymbol"),
-            "exchange": p.get("exchange"),
-            "product_type": p.get("product_type"),
-            "net_quantity": p.get("net_quantity"),
-            "net_averageprice": p.get("net_averageprice"),
-            "realized_pnl": p.get("realized_pnl"),
-            "unrealized_pnl": p.get("unrealized_pnl"),
-            "token": p.get("token", "-"),
-        })
-    return flat
-
-def resolve_shortcuts(order_params):
-    # Convert CLI style short codes to API expected values
-    exg = str(order_params['exchange']).strip().upper()
-    if exg in ("N", "NSE"):
-        order_params['exchange'] = "NSE"
-    elif exg in ("B", "BSE"):
-        order_params['exchange'] = "BSE"
-
-    ot = str(order_params['order_type']).strip().upper()
-    if ot in ("B", "BUY"):
-        order_params['order_type'] = "BUY"
-    elif ot in ("S", "SELL"):
-        order_params['order_type'] = "SELL"
-
-    pt = str(order_params['price_type']).strip().upper()
-    if pt in ("L", "LIMIT"):
-        order_params['price_type'] = "LIMIT"
-    elif pt in ("M", "MARKET"):
-        order_params['price_type'] = "MARKET"
-
-    val = str(order_params.get('validity', "")).strip().upper()
-    if val in ("D", "DAY"):
-        order_params['validity'] = "DAY"
-    elif val in ("I", "IOC"):
-        order_params['validity'] = "IOC"
-    return order_params
+    """Place through the client, which invalidates the cached order books; returns the broker's reply."""
+    return io.place_order(**order_kwargs)
+
+def basket_ltps(rows):
+    """LTPs for basket rows in one batched lookup (feed first, then /quotes), keyed by tradingsymbol."""
+    keys = {}
+    for r in rows:
+        exg = "NSE" if str(r["exchange"]).upper().startswith("N") else "BSE"
+        token = r["token"] if r["token"] not in (None, "", "-") else instrument_token(exg, r["tradingsymbol"])
+        if token:
+            keys[r["tradingsymbol"]] = (exg, str(token))
+    ltps = fetch_ltps(io, keys.values(), feed=feed)
+    return {symbol: ltps.get(key) for symbol, key in keys.items()}
+
+def basket_exit(rows, key, build_payloads):
+    """Select rows (or all of them) and exit them in one concurrent batch."""
+    with st.expander("Basket exit", expanded=False):
+        symbols = [r["tradingsymbol"] for r in rows]
+        select_all = st.checkbox("All", key=f"basket_all_{key}")
+        chosen = symbols if select_all else st.multiselect("Symbols to exit", symbols, key=f"basket_sel_{key}")
+        price_type = st.selectbox("Order type", ["MARKET", "LIMIT"], key=f"basket_pt_{key}")
+        if price_type == "LIMIT":
+            st.caption("LIMIT orders are priced at each symbol's LTP; rows without an LTP are skipped.")
+        remarks = st.text_input("Remarks (optional)", key=f"basket_remarks_{key}")
+        selected = [r for r in rows if r["tradingsymbol"] in set(chosen)]
+        ltps = basket_ltps(selected) if selected and price_type == "LIMIT" else {}
+        payloads = build_payloads(
+            selected, price_type=price_type, remarks=remarks,
+            price_for=lambda r: ltps.get(r["tradingsymbol"]),
+        ) if selected else []
+        if payloads:
+            st.dataframe(pd.DataFrame(payloads)[["tradingsymbol", "exchange", "order_type", "quantity", "product_type", "price_type", "price"]])
+        if st.button(f"Place {len(payloads)} exit orders", key=f"basket_go_{key}", disabled=not payloads):
+            start = time.perf_counter()
+            results = pd.DataFrame(place_basket(io, payloads))
+            placed = int((results["status"] == "placed").sum())
+            st.success(f"{placed} of {len(results)} orders placed in {time.perf_counter() - start:.1f} s")
+            st.dataframe(results)
 
 st.set_page_config(page_title="Exit Order", layout="wide")
 st.title("Exit Direct from Holding / Position")
 
+st.caption(refreshed_state().describe())
+
 tab = st.radio("Choose source for SELL order:", ["Holdings (NSE only)", "Positions"])
 
 if tab == "Holdings (NSE only)":
@@ -139,7 +90,9 @@ if tab == "Holdings (NSE only)":
     if len(df) == 0:
         st.warning("No holdings available.")
         st.stop()
+    feed.subscribe((h["exchange"], h["token"]) for h in holdings if h["token"] not in (None, "-"))
     st.dataframe(df)
+    basket_exit(holdings, "h", holdings_exit_payloads)
     for i, row in df.iterrows():
         col1, col2 = st.columns([4, 1])
         with col1:
@@ -152,7 +105,7 @@ if tab == "Holdings (NSE only)":
                     qty = st.number_input("Enter quantity to SELL", min_value=1, max_value=int(float(row["dp_qty"])), value=int(float(row["dp_qty"])), key=f"qty_h_{i}")
                     order_type = st.selectbox("Order type", ["LIMIT", "MARKET"], key=f"ordertype_h_{i}")
                     price = "0"
-                    ltp = fetch_ltp(row["exchange"], row["tradingsymbol"])
+                    ltp = fetch_ltp(row["exchange"], row["tradingsymbol"], row["token"])
                     if order_type == "LIMIT":
                         st.info(f"LTP (Last Traded Price): {ltp}")
                         price = st.text_input("Enter LIMIT price", value=str(ltp), key=f"price_h_{i}")
@@ -175,11 +128,15 @@ if tab == "Holdings (NSE only)":
                         order_kwargs = resolve_shortcuts(order_kwargs)
                         st.info("Outgoing Order Payload:")
                         st.json(order_kwargs)
-                        result = place_sell_order(order_kwargs)
-                        st.success("Order API response below:")
-                        st.json(result)
-                        if not (isinstance(result.get("json"), dict) and ("order_id" in result["json"] or "status" in result["json"])):
-                            st.warning("Order may not have been placed successfully. Please check order book for status or errors.")
+                        try:
+                            result = place_sell_order(order_kwargs)
+                        except Exception as e:
+                            st.error(f"Order Placement Failed: {e}")
+                        else:
+                            st.success("Order API response below:")
+                            st.json(result)
+                            if not (isinstance(result, dict) and ("order_id" in result or "status" in result)):
+                                st.warning("Order may not have been placed successfully. Please check order book for status or errors.")
 
 elif tab == "Positions":
     try:
@@ -193,7 +150,9 @@ elif tab == "Positions":
     if len(df) == 0:
         st.warning("No positions available.")
         st.stop()
+    feed.subscribe((p["exchange"], p["token"]) for p in positions if p["exchange"] and p["token"] not in (None, "-"))
     st.dataframe(df)
+    basket_exit(positions, "p", positions_exit_payloads)
     for i, row in df.iterrows():
         col1, col2 = st.columns([4, 1])
         with col1:
@@ -208,7 +167,7 @@ elif tab == "Positions":
                     qty = st.number_input("Enter quantity to SELL", min_value=1, max_value=max_qty, value=max_qty, key=f"qty_p_{i}")
                     order_type = st.selectbox("Order type", ["LIMIT", "MARKET"], key=f"ordertype_p_{i}")
                     price = "0"
-                    ltp = fetch_ltp(row["exchange"], row["tradingsymbol"])
+                    ltp = fetch_ltp(row["exchange"], row["tradingsymbol"], row["token"])
                     if order_type == "LIMIT":
                         st.info(f"LTP (Last Traded Price): {ltp}")
                         price = st.text_input("Enter LIMIT price", value=str(ltp), key=f"price_p_{i}")
@@ -231,8 +190,12 @@ elif tab == "Positions":
                         order_kwargs = resolve_shortcuts(order_kwargs)
                         st.info("Outgoing Order Payload:")
                         st.json(order_kwargs)
-                        result = place_sell_order(order_kwargs)
-                        st.success("Order API response below:")
-                        st.json(result)
-                        if not (isinstance(result.get("json"), dict) and ("order_id" in result["json"] or "status" in result["json"])):
-                            st.warning("Order may not have been placed successfully. Please check order book for status or errors.")
+                        try:
+                            result = place_sell_order(order_kwargs)
+                        except Exception as e:
+                            st.error(f"Order Placement Failed: {e}")
+                        else:
+                            st.success("Order API response below:")
+                            st.json(result)
+                            if not (isinstance(result, dict) and ("order_id" in result or "status" in result)):
+                                st.warning("Order may not have been placed successfully. Please check order book for status or errors.")
@@ -1,63 +1,33 @@
 import streamlit as st
 import pandas as pd
-from integrate import ConnectToIntegrate, IntegrateOrders
+from broker import get_integrate, refreshed_state
 
 # --- LOGIN BLOCK ---
-api_token = st.secrets["integrate_api_token"]
-api_secret = st.secrets["integrate_api_secret"]
-uid = st.secrets["integrate_uid"]
-actid = st.secrets["integrate_actid"]
-api_session_key = st.secrets["integrate_api_session_key"]
-ws_session_key = st.secrets["integrate_ws_session_key"]
-
-conn = ConnectToIntegrate()
-conn.login(api_token, api_secret)
-conn.set_session_keys(uid, actid, api_session_key, ws_session_key)
-io = IntegrateOrders(conn)
+io = get_integrate()
+conn = io.conn
 
 st.title("Order Book & Trade Book")
 
-st.subheader("Regular Order Book")
-try:
-    resp = io.orders()
-    orders = resp.get("orders") or resp.get("data", [])
-    if not orders:
-        st.info("No regular orders found.")
+state = refreshed_state()
+snap = state.snapshot
+st.caption(
+    state.describe() + " | "
+    + " | ".join(f"{b.name}: {b.latency * 1000:.0f} ms{' (cached)' if b.cached else ''}" for b in snap.books.values())
+)
+
+def render_book(book, label, empty_message):
+    if book.error:
+        st.error(f"Failed to get {label}: {book.error}")
+    elif not book.rows:
+        st.info(empty_message)
     else:
-        st.dataframe(pd.DataFrame(orders))
-except Exception as e:
-    st.error(f"Failed to get regular order book: {e}")
+        st.dataframe(pd.DataFrame(book.rows))
+
+st.subheader("Regular Order Book")
+render_book(snap["orders"], "regular order book", "No regular orders found.")
 
 st.subheader("GTT & OCO GTT Order Book")
-try:
-    resp = io.gtt_orders() if hasattr(io, "gtt_orders") else {}
-    orders = (
-        resp.get("pendingGTTOrderBook")
-        or resp.get("gtt_orders")
-        or resp.get("data", [])
-    )
-    if not orders:
-        st.info("No GTT orders found.")
-    else:
-        st.dataframe(pd.DataFrame(orders))
-except Exception as e:
-    st.error(f"Failed to get GTT order book: {e}")
+render_book(snap["gtt_orders"], "GTT order book", "No GTT orders found.")
 
 st.subheader("Trade Book")
-try:
-    if hasattr(io, "trade_book"):
-        resp = io.trade_book()
-    elif hasattr(io, "trades"):
-        resp = io.trades()
-    elif hasattr(io, "tradebook"):
-        resp = io.tradebook()
-    else:
-        st.warning("No trade book method found in IntegrateOrders. Please check method name.")
-        resp = {}
-    trades = resp.get("trades") or resp.get("data", [])
-    if not trades:
-        st.info("No trades found.")
-    else:
-        st.dataframe(pd.DataFrame(trades))
-except Exception as e:
-    st.error(f"Failed to get trade book: {e}")
+render_book(snap["trades"], "trade book", "No trades found.")
@@ -0,0 +1,65 @@
+import re
+import time
+from datetime import datetime, timedelta
+
+import streamlit as st
+from broker import get_bar_store, get_calendar, get_integrate, get_scanner, instrument_token, refreshed_state
+from quotes import build_master_mapping_from_holdings
+from scan import ScanSettings
+from trading_calendar import IST
+
+io = get_integrate()
+calendar = get_calendar()
+
+st.set_page_config(page_title="Scanner", layout="wide")
+st.title("Indicator Scan")
+st.caption(
+    "Daily-bar scan: SMA trend and crossover, RSI, ATR and N-day breakout. "
+    "Score counts the conditions met (close above slow SMA, fast above slow, "
+    "breakout, RSI in range); rows are ranked by Score, then RSI."
+)
+
+universe = st.radio("Universe", ["Holdings", "Symbols"], horizontal=True)
+if universe == "Holdings":
+    mapping = build_master_mapping_from_holdings(refreshed_state().snapshot["holdings"].result())
+    # NSE listings only, so dual-listed holdings are scanned once
+    instruments = {tsym: (m["segment"], m["token"]) for (exch, tsym), m in mapping.items() if exch == "NSE"}
+else:
+    exchange = st.selectbox("Exchange", ["NSE", "BSE"])
+    text = st.text_area("Trading symbols (comma, space or newline separated)", placeholder="RELIANCE-EQ, TCS-EQ")
+    instruments, unknown = {}, []
+    for tsym in dict.fromkeys(s.upper() for s in re.split(r"[\s,]+", text) if s):
+        token = instrument_token(exchange, tsym)
+        if token:
+            instruments[tsym] = (exchange, str(token))
+        else:
+            unknown.append(tsym)
+    if unknown:
+        st.warning("Not in the instrument master: " + ", ".join(unknown))
+
+cols = st.columns(6)
+settings = ScanSettings(
+    fast=cols[0].number_input("Fast SMA", 2, 200, 20),
+    slow=cols[1].number_input("Slow SMA", 5, 400, 50),
+    rsi=cols[2].number_input("RSI period", 2, 50, 14),
+    atr=cols[3].number_input("ATR period", 2, 50, 14),
+    breakout=cols[4].number_input("Breakout (days)", 5, 260, 20),
+)
+lookback = cols[5].number_input("History (days)", 90, 3650, 400, step=30)
+
+if not instruments:
+    st.info("No symbols to scan.")
+    st.stop()
+if st.button(f"Scan {len(instruments)} symbols"):
+    end = datetime.now(IST).date()
+    start = time.perf_counter()
+    with st.spinner("Loading bars..."):
+        bars = get_bar_store().fetch_many(io, instruments.values(), "day", end - timedelta(days=int(lookback)), end, calendar)
+    loaded = time.perf_counter() - start
+    frames = {tsym: bars[(str(seg), str(tok))] for tsym, (seg, tok) in instruments.items()}
+    result = get_scanner().scan(frames, settings)
+    st.caption(
+        f"Scanned {result.symbols} symbols in {result.elapsed * 1000:.0f} ms "
+        f"({result.throughput:,.0f} symbols/s on {result.workers} worker(s)); bars loaded in {loaded:.1f} s"
+    )
+    st.dataframe(result.table, hide_index=True)
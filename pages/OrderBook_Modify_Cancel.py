@@ -1,74 +1,58 @@
+import time
+
 import streamlit as st
-import requests
 import pandas as pd
+import basket
+from basket import cancel_orders, filter_pending_orders, reprice_orders
+from broker import get_integrate, get_market_feed, get_order_book, get_refresher, instrument_tick_size, refreshed_state
 
-BASE_URL = "https://integrate.definedgesecurities.com/dart/v1"
-api_session_key = st.secrets["integrate_api_session_key"]
-
-def get_headers():
-    return {"Authorization": api_session_key}
+io = get_integrate()
+conn = io.conn
+feed = get_market_feed()
 
 def fetch_order_book():
-    url = f"{BASE_URL}/orders"
-    response = requests.get(url, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+    # Kept current by the order stream and the background refresher; no HTTP call here
+    return get_order_book()
 
 def fetch_ltp(exchange, token):
-    url = f"{BASE_URL}/quotes/{exchange}/{token}"
+    ltp = feed.ltp(exchange, token)
+    if ltp is not None:
+        return ltp
     try:
-        response = requests.get(url, headers=get_headers())
-        response.raise_for_status()
-        data = response.json()
+        data = io.quotes(exchange, token)
         return data.get("ltp", "-")
     except Exception:
         return "-"
 
 def cancel_order(order_id):
-    url = f"{BASE_URL}/cancel/{order_id}"
-    response = requests.get(url, headers=get_headers())
-    response.raise_for_status()
-    return response.json()
+    return io.cancel_order(order_id)
 
 def modify_order(order, new_price, new_qty, new_trigger_price=None):
-    url = f"{BASE_URL}/modify"
-    payload = {
-        "exchange": order.get("exchange"),
-        "order_id": order.get("order_id"),
-        "tradingsymbol": order.get("tradingsymbol"),
-        "quantity": str(new_qty),
-        "price": str(new_price),
-        "product_type": order.get("product_type"),
-        "order_type": order.get("order_type"),
-        "price_type": order.get("price_type"),
-        "validity": order.get("validity"),
-        "disclosed_quantity": order.get("disclosed_quantity") or "0",
-        "remarks": order.get("remarks") or "",
-    }
-    if new_trigger_price is not None:
-        payload["trigger_price"] = str(new_trigger_price)
-    response = requests.post(
-        url, headers={**get_headers(), "Content-Type": "application/json"}, json=payload
-    )
-    response.raise_for_status()
-    return response.json()
-
-def filter_pending_orders(order_book):
-    pending_status = {"NEW", "OPEN", "REPLACED"}
-    filtered = [
-        o for o in order_book
-        if o.get("order_status") in pending_status and int(float(o.get("pending_qty", 0))) > 0
-    ]
-    return filtered
+    return basket.modify_order(io, order, new_price, new_qty, new_trigger_price)
+
+def run_bulk(action, orders):
+    """Run a bulk action, keep its outcomes for the next render and rerun once a book fetched after it lands."""
+    start = time.perf_counter()
+    results = action(orders)
+    st.session_state["bulk_results"] = (pd.DataFrame(results), time.perf_counter() - start)
+    get_refresher().refresh_now()
+    st.rerun()
 
 st.set_page_config(page_title="Modify/Cancel Order", layout="wide")
 st.title("Order Book: Modify / Cancel Pending Orders")
 
+st.caption(refreshed_state().describe())
+
+# Outcomes of the last bulk action, kept across the rerun that refreshed the book
+if "bulk_results" in st.session_state:
+    results, seconds = st.session_state.pop("bulk_results")
+    done = int((results["status"] == "done").sum())
+    st.success(f"{done} of {len(results)} orders done in {seconds:.2f} s; the order book below is refreshed.")
+    st.dataframe(results)
+
 # Fetch order book
 try:
-    order_book_resp = fetch_order_book()
-    orders = order_book_resp.get("orders", [])
-    pending_orders = filter_pending_orders(orders)
+    pending_orders = filter_pending_orders(fetch_order_book())
 except Exception as e:
     st.error(f"Failed to fetch order book: {e}")
     pending_orders = []
@@ -77,12 +61,37 @@ if not pending_orders:
     st.info("No pending orders found.")
     st.stop()
 
+feed.subscribe((o.get("exchange"), o.get("token")) for o in pending_orders if o.get("exchange") and o.get("token"))
+
 df = pd.DataFrame(pending_orders)
 show_cols = [
     "order_id", "tradingsymbol", "exchange", "order_type", "price_type", "product_type",
     "quantity", "pending_qty", "filled_qty", "price", "order_status", "order_entry_time"
 ]
-st.dataframe(df[show_cols])
+# Orders seen only on the stream lack poll-only columns such as order_entry_time
+st.dataframe(df.reindex(columns=show_cols))
+
+st.write("**Bulk actions:**")
+bulk1, bulk2, bulk3 = st.columns(3)
+with bulk1:
+    if st.button(f"Cancel all ({len(pending_orders)})", key="bulk_cancel_all"):
+        run_bulk(lambda orders: cancel_orders(io, orders), pending_orders)
+with bulk2:
+    symbols = sorted({o.get("tradingsymbol") for o in pending_orders})
+    symbol = st.selectbox("Symbol", symbols, key="bulk_symbol")
+    if st.button(f"Cancel all {symbol}", key="bulk_cancel_symbol"):
+        run_bulk(lambda orders: cancel_orders(io, orders), [o for o in pending_orders if o.get("tradingsymbol") == symbol])
+with bulk3:
+    ticks = st.number_input("Ticks from LTP (+ chases, - rests behind)", value=0, step=1, key="bulk_ticks")
+    if st.button("Reprice all LIMIT orders to LTP", key="bulk_reprice"):
+        run_bulk(
+            lambda orders: reprice_orders(
+                io, orders, int(ticks),
+                ltp_for=lambda o: fetch_ltp(o.get("exchange"), o.get("token")),
+                tick_for=lambda o: instrument_tick_size(o.get("exchange"), o.get("token")),
+            ),
+            pending_orders,
+        )
 
 st.write("**Modify / Cancel individual pending orders below:**")
 
@@ -1,23 +1,16 @@
 import streamlit as st
 import math
-import requests
-from integrate import ConnectToIntegrate, IntegrateOrders
+import pandas as pd
+from basket import basket_buy_payloads, check_basket, parse_basket, place_basket, size_basket
+from broker import (
+    get_instruments, get_integrate, get_market_feed, get_order_book, get_symbol_search, get_trigger_index,
+    instrument_token, refreshed_state,
+)
+from quotes import fetch_ltps
 
 # --- Session/Secrets ---
-api_token = st.secrets["integrate_api_token"]
-api_secret = st.secrets["integrate_api_secret"]
-uid = st.secrets["integrate_uid"]
-actid = st.secrets["integrate_actid"]
-api_session_key = st.secrets["integrate_api_session_key"]
-ws_session_key = st.secrets["integrate_ws_session_key"]
-
-conn = ConnectToIntegrate()
-conn.login(api_token, api_secret)
-conn.set_session_keys(uid, actid, api_session_key, ws_session_key)
-io = IntegrateOrders(conn)
-
-BASE_URL = "https://integrate.definedgesecurities.com/dart/v1"
-HEADERS = {"Authorization": api_session_key}
+io = get_integrate()
+conn = io.conn
 
 st.set_page_config(page_title="Order Dashboard", layout="wide")
 st.title("Order Management: Broker Style (Minimal Fields)")
@@ -53,6 +46,10 @@ def minimal_modify_form(order, on_submit=None):
                 order=order
             )
 
+state = refreshed_state()
+snap = state.snapshot
+st.caption(state.describe())
+
 # --- Layout ---
 col1, col2, col3 = st.columns([1.7, 1.7, 1.6])
 
@@ -60,11 +57,13 @@ col1, col2, col3 = st.columns([1.7, 1.7, 1.6])
 with col1:
     st.subheader("Order Book")
     try:
-        r = requests.get(f"{BASE_URL}/orders", headers=HEADERS)
-        r.raise_for_status()
-        data = r.json()
-        orders = data.get("orders", [])
-        if not orders:
+        order_book = get_order_book()
+        views = {"All": order_book.rows, "Pending": order_book.pending, "Filled": order_book.filled, "Rejected": order_book.rejected}
+        view = st.radio("Show", list(views), horizontal=True, key="order_view")
+        orders = views[view]()
+        if not orders and not snap["orders"].ok:
+            st.error(f"Failed to fetch order book: {snap['orders'].error}")
+        elif not orders:
             st.info("No orders found.")
         else:
             df = []
@@ -110,33 +109,45 @@ with col1:
                         st.success(f"Order Cancelled: {resp}")
                     except Exception as e:
                         st.error(f"Cancel failed: {e}")
+    except Exception as e:
+        st.error(f"Failed to fetch order book: {e}")
 
 # --- 2. NEW CNC BUY/SELL ORDER ---
 with col2:
     st.subheader("Place CNC Buy/Sell")
+    # Symbol lookup sits outside the form so suggestions update as you type
+    symbol_search = get_symbol_search()
+    exchange = st.selectbox("Exchange", ["NSE", "BSE"])
+    query = st.text_input("Symbol (e.g. SBIN-EQ)", value="HPL-EQ")
+    suggestions = symbol_search.suggest(query, exchange) if symbol_search and query else []
+    if suggestions:
+        tradingsymbol = st.selectbox("Matching symbols", suggestions)
+    else:
+        tradingsymbol = query.strip().upper()
+        if symbol_search and query:
+            st.warning(f"No {exchange} symbol matches '{query}'.")
     with st.form("cnc_form", clear_on_submit=True):
-        tradingsymbol = st.text_input("Symbol (e.g. SBIN-EQ)", value="HPL-EQ")
         side = st.selectbox("Order Side", ["BUY", "SELL"])
         quantity = st.number_input("Quantity (set 0 if using amount)", min_value=0, value=0, step=1)
         amount = st.number_input("Total Amount (Rs)", min_value=0, value=55000)
         price = st.number_input("Limit Price (for Market, leave as 0)", min_value=0.0, value=588.0)
         price_type = st.selectbox("Price Type", ["LIMIT", "MARKET"])
-        exchange = st.selectbox("Exchange", ["NSE", "BSE"])
         validity = st.selectbox("Validity", ["DAY", "IOC"])
         submitted = st.form_submit_button("Place Order")
-        if submitted:
+        if submitted and symbol_search and not symbol_search.validate(exchange, tradingsymbol)[0]:
+            st.error(f"Unknown {exchange} symbol '{tradingsymbol}'. Pick one of the suggestions.")
+        elif submitted:
             try:
                 use_amount = amount > 0
                 use_price = price if price_type == "LIMIT" and price > 0 else None
                 ltp = None
                 if use_amount and (use_price is None or use_price == 0):
-                    token_map = {"TEXRAIL-EQ": "5489", "SBIN-EQ": "3045"}
-                    token = token_map.get(tradingsymbol)
+                    token = instrument_token(exchange, tradingsymbol)
                     if token:
-                        url = f"{BASE_URL}/quotes/{exchange}/{token}"
-                        res = requests.get(url, headers=HEADERS, timeout=10)
-                        if res.status_code == 200:
-                            ltp = float(res.json().get('ltp'))
+                        try:
+                            ltp = float(io.quotes(exchange, token).get('ltp'))
+                        except Exception:
+                            ltp = None
                     if ltp:
                         use_price = ltp
                 final_qty = int(quantity)
@@ -163,10 +174,8 @@ with col2:
 with col3:
     st.subheader("GTT Order Book")
     try:
-        r = requests.get(f"{BASE_URL}/gttorders", headers=HEADERS)
-        r.raise_for_status()
-        data = r.json()
-        orders = data.get("pendingGTTOrderBook") or next((v for v in data.values() if isinstance(v, list)), [])
+        data = snap["gtt_orders"].result()
+        orders = snap["gtt_orders"].rows or next((tuple(v) for v in data.values() if isinstance(v, list)), ())
         if not orders:
             st.info("No GTT orders found.")
         else:
@@ -201,9 +210,8 @@ with col3:
                             "product_type": order.get("product_type", "CNC"),
                         }
                         try:
-                            url = f"{BASE_URL}/gttmodify"
-                            resp = requests.post(url, headers={**HEADERS, "Content-Type": "application/json"}, json=payload)
-                            st.success(f"GTT Modified: {resp.json()}")
+                            resp = io.modify_gtt_order(payload)
+                            st.success(f"GTT Modified: {resp}")
                         except Exception as e:
                             st.error(f"Failed: {e}")
                     minimal_modify_form(selected, on_submit=handle_gtt_modify)
@@ -212,10 +220,92 @@ with col3:
                     alert_id = selected.get("alert_id")
                     is_oco = bool(selected.get("stoploss_price"))
                     if is_oco:
-                        url = f"{BASE_URL}/ococancel/{alert_id}"
+                        resp = io.cancel_oco_order(alert_id)
                     else:
-                        url = f"{BASE_URL}/gttcancel/{alert_id}"
-                    resp = requests.get(url, headers=HEADERS)
-                    st.success(f"GTT Cancelled: {resp.json()}")
+                        resp = io.cancel_gtt_order(alert_id)
+                    st.success(f"GTT Cancelled: {resp}")
     except Exception as e:
         st.error(f"Failed to fetch GTT order book: {e}")
+
+    # Alerts closest to firing, from the trigger index the feed evaluates on every tick
+    try:
+        triggers = get_trigger_index()
+        triggers.load_fetch(snap["gtt_orders"])
+        unpriced = [key for key in triggers.instruments() if key not in triggers.prices()]
+        for (exch, token), ltp in fetch_ltps(io, unpriced, feed=get_market_feed()).items():
+            if ltp is not None:
+                triggers.update(exch, token, ltp)
+        watch = triggers.frame()
+        if len(watch):
+            states = watch["State"].value_counts()
+            st.write(
+                f"**Trigger watch:** {states.get('Triggered', 0)} triggered, "
+                f"{states.get('Near', 0)} within {triggers.near_percent:g}% of {len(watch)} legs"
+            )
+            st.dataframe(
+                watch, height=250, hide_index=True,
+                column_config={"Distance %": st.column_config.NumberColumn(format="%.2f")},
+            )
+        if triggers.skipped:
+            st.caption(f"{triggers.skipped} GTT rows not watched (no token, price or condition).")
+    except Exception as e:
+        st.error(f"Failed to evaluate GTT triggers: {e}")
+
+# --- 4. BASKET BUY ---
+st.subheader("Basket Buy (CNC)")
+b1, b2 = st.columns([1.2, 2])
+with b1:
+    basket_exchange = st.selectbox("Exchange", ["NSE", "BSE"], key="basket_exchange")
+    basket_text = st.text_area(
+        "One symbol per line with a weight or a rupee amount",
+        placeholder="SBIN-EQ 30%\nTCS-EQ 20%\nINFY-EQ 50%",
+        height=200,
+        key="basket_text",
+    )
+    mode = st.radio("Values are", ["weights", "amounts"], horizontal=True, key="basket_mode")
+    capital = st.number_input("Capital to allocate (Rs)", min_value=0, value=100000, step=1000, key="basket_capital", disabled=mode != "weights")
+    basket_price_type = st.selectbox("Price Type", ["LIMIT", "MARKET"], key="basket_price_type")
+    preview_clicked = st.button("Preview basket", key="basket_preview_button")
+with b2:
+    if preview_clicked:
+        st.session_state.pop("basket_preview", None)
+        entries, bad = parse_basket(basket_text)
+        if bad:
+            st.warning("Ignored lines: " + "; ".join(bad))
+        try:
+            check_basket(entries, mode)
+            master = get_instruments()
+        except ValueError as e:
+            master = None
+            st.error(str(e))
+        except Exception as e:
+            master = None
+            st.error(f"Instrument master unavailable: {e}")
+        if master and entries:
+            instruments = [master.by_symbol(basket_exchange, sym) for sym, _, _ in entries]
+            unknown = [sym for (sym, _, _), inst in zip(entries, instruments) if inst is None]
+            if unknown:
+                st.warning("Unknown symbols skipped: " + ", ".join(unknown))
+            known = [(entry, inst) for entry, inst in zip(entries, instruments) if inst is not None]
+            # All LTPs in one concurrent batch (stream first, then the shared quote cache)
+            ltps = fetch_ltps(io, [(basket_exchange, inst.token) for _, inst in known], feed=get_market_feed())
+            # Keep the exchange and price type the preview was sized for, so
+            # changing the selectboxes afterwards can't redirect the orders
+            frame = size_basket(
+                [sym for (sym, _, _), _ in known],
+                [value for (_, value, _), _ in known],
+                [ltps.get((basket_exchange, inst.token)) for _, inst in known],
+                [inst.lot_size for _, inst in known],
+                [inst.tick_size for _, inst in known],
+                mode=mode,
+                capital=capital,
+            )
+            st.session_state["basket_preview"] = (frame, basket_exchange, basket_price_type)
+    if st.session_state.get("basket_preview") is not None:
+        preview, preview_exchange, preview_price_type = st.session_state["basket_preview"]
+        st.dataframe(preview, use_container_width=True)
+        st.caption(f"{int((preview['Qty'] > 0).sum())} {preview_exchange} {preview_price_type} orders, Rs {preview['Cost'].sum():,.2f} to deploy, Rs {preview['Unspent'].sum():,.2f} unspent")
+        if st.button("Place basket", key="basket_place", disabled=not (preview["Qty"] > 0).any()):
+            results = place_basket(io, basket_buy_payloads(preview, preview_exchange, preview_price_type))
+            st.session_state.pop("basket_preview", None)
+            st.dataframe(pd.DataFrame(results), use_container_width=True)
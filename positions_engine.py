@@ -0,0 +1,117 @@
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from holdings_engine import to_float_array
+
+# (payload key, display name, kind) for the leading columns of the positions table.
+# percent_change is derived, not read from the payload.
+POSITION_SCHEMA = [
+    ("tradingsymbol", "Symbol", "label"),
+    ("net_averageprice", "Avg. Buy", "float"),
+    ("net_quantity", "Qty", "float"),
+    ("unrealized_pnl", "Unrealised P&L", "float"),
+    ("realized_pnl", "Realized P&L", "float"),
+    ("percent_change", "% Change", "float"),
+    ("product_type", "Product Type", "label"),
+]
+
+SCHEMA_KEYS = {key for key, _, _ in POSITION_SCHEMA}
+
+# Known payload keys outside the leading columns; anything else is inferred
+KNOWN_KINDS = {
+    "exchange": "label",
+    "token": "label",
+    "lastPrice": "float",
+    "net_amount": "float",
+    "day_buy_quantity": "float",
+    "day_sell_quantity": "float",
+    "day_buy_average": "float",
+    "day_sell_average": "float",
+    "day_buy_amount": "float",
+    "day_sell_amount": "float",
+    "multiplier": "float",
+    **{key: kind for key, _, kind in POSITION_SCHEMA},
+}
+
+def _infer_kind(values):
+    present = [v for v in values if v not in (None, "")]
+    if not present:
+        return "label"
+    try:
+        np.array(present, dtype=np.float64)
+        return "float"
+    except (TypeError, ValueError):
+        return "label"
+
+def _labels(values):
+    """
+    Categorical when labels repeat (exchange, product type, symbols held in
+    several products); a plain string array when they are mostly unique,
+    where categories would only add a codes array on top of the strings.
+    """
+    labels = ["" if v is None else str(v) for v in values]
+    seen = {}
+    codes = np.fromiter((seen.setdefault(v, len(seen)) for v in labels), np.int32, len(labels))
+    if len(seen) > max(1, len(labels) // 2):
+        return pd.array(labels, dtype="str")
+    return pd.Categorical.from_codes(codes, pd.Index(list(seen)))
+
+def _typed(values, kind):
+    return to_float_array(values) if kind == "float" else _labels(values)
+
+def parse_positions(positions_book):
+    """
+    Parse the /positions payload once into typed columns. Keys are the union
+    over all rows (not just the first), so heterogeneous rows keep their
+    fields; a key missing from a row is NaN or "".
+    """
+    raw = positions_book.get("positions", []) if isinstance(positions_book, dict) else []
+    rows = [p for p in raw if isinstance(p, dict)] if isinstance(raw, list) else []
+    # First row's key order, then keys only later rows carry
+    keys = dict.fromkeys(rows[0]) if rows else {}
+    for key in sorted(set().union(*rows) - keys.keys()):
+        keys[key] = None
+    for key, _, _ in POSITION_SCHEMA:
+        keys.setdefault(key, None)
+    keys.pop("percent_change", None)
+
+    # One pass over the rows: itemgetter for rows carrying every key (the usual
+    # case), dict.get only for the ragged ones.
+    names = list(keys)
+    getter = itemgetter(*names)
+    if len(names) == 1:
+        getter = lambda p, g=getter: (g(p),)
+    wanted = set(names)
+    records = [getter(p) if p.keys() >= wanted else tuple(p.get(k) for k in names) for p in rows]
+    by_key = list(zip(*records)) if records else [()] * len(names)
+
+    columns = {}
+    for key, values in zip(names, by_key):
+        columns[key] = _typed(values, KNOWN_KINDS.get(key) or _infer_kind(values))
+
+    last = columns.get("lastPrice", np.full(len(rows), np.nan))
+    avg = columns["net_averageprice"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = np.round((last - avg) / avg * 100, 2)
+    columns["percent_change"] = np.where(np.isfinite(pct) & (avg != 0), pct, np.nan)
+    return columns
+
+def summarize_positions(columns):
+    realized = float(np.nansum(columns["realized_pnl"]))
+    unrealized = float(np.nansum(columns["unrealized_pnl"]))
+    return pd.DataFrame(
+        [
+            ["Total Realized P&L", round(realized, 2)],
+            ["Total Unrealized P&L", round(unrealized, 2)],
+            ["Total Net P&L", round(realized + unrealized, 2)],
+        ],
+        columns=["Summary", "Amount"],
+    )
+
+def positions_frame(columns):
+    """Schema columns first under their display names, then every other payload key."""
+    leading = {display: columns[key] for key, display, _ in POSITION_SCHEMA}
+    rest = {key: values for key, values in columns.items() if key not in SCHEMA_KEYS}
+    return pd.DataFrame({**leading, **rest})
@@ -0,0 +1,131 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from history_parser import parse_history
+from trading_calendar import default_calendar
+
+def build_master_mapping_from_holdings(holdings_book):
+    mapping = {}
+    raw = holdings_book.get('data', [])
+    if not isinstance(raw, list):
+        return mapping
+    for h in raw:
+        tradingsymbols = h.get("tradingsymbol")
+        if isinstance(tradingsymbols, list):
+            for ts in tradingsymbols:
+                exch = ts.get("exchange", "NSE")
+                tsym = ts.get("tradingsymbol", "")
+                token = ts.get("token", "")
+                if exch and tsym and token:
+                    mapping[(exch, tsym)] = {'segment': exch, 'token': token}
+    return mapping
+
+def fetch_daily_closes(io, segment, token, start, end):
+    """
+    One ranged /history request for day bars from `start` to `end` inclusive.
+    Returns {date: close}.
+    """
+    from_time = start.strftime('%d%m%Y') + "0000"
+    to_time = end.strftime('%d%m%Y') + "1530"
+    bars = parse_history(io.history(segment, token, "day", from_time, to_time))
+    days = bars["time"].astype("datetime64[D]").tolist()
+    return dict(zip(days, bars["close"].tolist()))
+
+def get_ltp(io, segment, token, feed=None):
+    # A streamed price from market_feed.MarketFeed saves the /quotes round trip
+    ltp = feed.ltp(segment, token) if feed is not None else None
+    if ltp is None:
+        try:
+            data = io.quotes(segment, token)
+            ltp = float(data.get('ltp')) if data.get('ltp') not in (None, "null", "") else None
+        except Exception:
+            pass
+    return ltp
+
+def fetch_ltps(io, instruments, max_workers=None, feed=None):
+    """
+    LTPs for many (segment, token) pairs in one concurrent batch, feed first
+    and /quotes otherwise. Returns {(segment, token): ltp or None}.
+    """
+    targets = list(dict.fromkeys((str(seg), str(tok)) for seg, tok in instruments))
+    if not targets:
+        return {}
+    workers = max(1, min(max_workers or io.conn.pool_size, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        ltps = pool.map(lambda t: get_ltp(io, t[0], t[1], feed), targets)
+        return dict(zip(targets, ltps))
+
+# Calendar days searched back from the current session when the reference
+# session has no bar (a holiday missing from the holiday file)
+CLOSE_LOOKBACK_DAYS = 10
+
+# (segment, token, reference session) already found to have no close, so a
+# refresher round does not ask /history again for the rest of the day. Only
+# each segment's current reference session is kept.
+_no_close = set()
+_no_close_lock = threading.Lock()
+
+def previous_close(io, segment, token, session, current):
+    """
+    Close of `session`, or, when that day has no bar, of the last bar
+    strictly before `current` within CLOSE_LOOKBACK_DAYS. Returns
+    (close or None, {date: close} worth caching).
+    """
+    closes = fetch_daily_closes(io, segment, token, session, session)
+    if session in closes:
+        return closes[session], {session: closes[session]}
+    closes = fetch_daily_closes(io, segment, token, current - timedelta(days=CLOSE_LOOKBACK_DAYS), current - timedelta(days=1))
+    earlier = [day for day in closes if day < current]
+    if not earlier:
+        return None, {}
+    last = max(earlier)
+    # The skipped day did not trade, so its close is the last one before it
+    return closes[last], {last: closes[last], session: closes[last]}
+
+def get_definedge_ltp_and_yclose(io, segment, token, cache=None, calendar=None, feed=None):
+    ltp = get_ltp(io, segment, token, feed)
+
+    # The reference session is always completed, so its close is final and cacheable
+    calendar = calendar or default_calendar()
+    current = calendar.current_session(exchange=segment)
+    session = calendar.previous_session(current, exchange=segment)
+    if cache is not None:
+        yclose = cache.get(segment, token, session)
+        if yclose is not None:
+            return ltp, yclose
+    key = (segment, str(token), session)
+    if key in _no_close:
+        return ltp, None
+
+    try:
+        yclose, closes = previous_close(io, segment, token, session, current)
+    except Exception:
+        return ltp, None
+    if yclose is None:
+        with _no_close_lock:
+            _no_close.difference_update([k for k in _no_close if k[0] == segment and k[2] != session])
+            _no_close.add(key)
+    elif cache is not None:
+        cache.store(segment, token, closes)
+    return ltp, yclose
+
+def fetch_quotes(io, master_mapping, max_workers=None, cache=None, calendar=None, feed=None):
+    """
+    Resolve (ltp, yclose) for every token in a build_master_mapping_from_holdings
+    mapping concurrently. Returns {token: (ltp, yclose)}.
+
+    max_workers caps the number of in-flight symbols; it defaults to the
+    connection pool size so workers never queue for a socket. Pass a
+    close_cache.CloseCache to serve previous closes from disk and a
+    market_feed.MarketFeed to take LTPs from the stream when it has them.
+    """
+    targets = {v['token']: v['segment'] for v in master_mapping.values()}
+    if not targets:
+        return {}
+    workers = max(1, min(max_workers or io.conn.pool_size, len(targets)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            token: pool.submit(get_definedge_ltp_and_yclose, io, segment, token, cache, calendar, feed)
+            for token, segment in targets.items()
+        }
+    return {token: f.result() for token, f in futures.items()}
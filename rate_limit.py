@@ -0,0 +1,117 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import Counter
+
+# Endpoint groups in priority order: lower numbers are served first when
+# callers compete for the shared (account-wide) budget.
+PRIORITIES = {
+    "orders": 0,
+    "books": 1,
+    "quotes": 2,
+    "history": 2,
+}
+
+# (requests per second, burst) per group, plus "total" for the whole account
+DEFAULT_LIMITS = {
+    "total": (10.0, 10),
+    "orders": (10.0, 10),
+    "books": (5.0, 5),
+    "quotes": (8.0, 8),
+    "history": (3.0, 3),
+}
+
+class TokenBucket:
+    """Refills at `rate` tokens per second up to `burst`. Not thread-safe; RateLimiter holds the lock."""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self):
+        """Seconds until one token is available (0 if one is available now)."""
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+class RateLimiter:
+    """
+    Client-side token buckets for the broker API: one per endpoint group
+    plus one shared "total" bucket.
+
+    A request first waits for its own group's bucket, then queues for the
+    total bucket by priority (orders, then books, then quotes/history), so
+    an order placed during a large quote fan-out goes out on the next free
+    token instead of behind hundreds of lookups. A group's own limit never
+    blocks other groups.
+
+    metrics() reports per-group request counts, current and peak queue
+    depth, and total/peak wait time.
+    """
+
+    def __init__(self, limits=None):
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self._buckets = {group: TokenBucket(*limit) for group, limit in limits.items()}
+        self._total = self._buckets.pop("total")
+        self._cond = threading.Condition()
+        self._queue = []  # (priority, seq) waiting on the total bucket
+        self._seq = itertools.count()
+        self._stats = {group: Counter() for group in (*self._buckets, *PRIORITIES)}
+
+    def acquire(self, group):
+        """Block until `group` may send one request; returns the seconds spent waiting."""
+        start = time.monotonic()
+        stats = self._stats.setdefault(group, Counter())
+        bucket = self._buckets.get(group)
+        entry = None
+        with self._cond:
+            stats["queued"] += 1
+            stats["peak_queued"] = max(stats["peak_queued"], stats["queued"])
+            try:
+                # Own group's limit first, outside the priority queue
+                while bucket is not None:
+                    bucket.refill(time.monotonic())
+                    delay = bucket.delay()
+                    if delay == 0:
+                        bucket.tokens -= 1
+                        break
+                    self._cond.wait(delay)
+
+                entry = (PRIORITIES.get(group, len(PRIORITIES)), next(self._seq))
+                heapq.heappush(self._queue, entry)
+                while True:
+                    if self._queue[0] == entry:
+                        self._total.refill(time.monotonic())
+                        delay = self._total.delay()
+                        if delay == 0:
+                            self._total.tokens -= 1
+                            heapq.heappop(self._queue)
+                            # Next in line becomes head
+                            self._cond.notify_all()
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait()
+            finally:
+                stats["queued"] -= 1
+                if entry in self._queue:
+                    # Interrupted while queued: do not leave a dead head blocking everyone
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+            waited = time.monotonic() - start
+            stats["requests"] += 1
+            stats["wait_ms"] += int(waited * 1000)
+            stats["peak_wait_ms"] = max(stats["peak_wait_ms"], int(waited * 1000))
+        return waited
+
+    def metrics(self):
+        """{group: {"requests", "queued", "peak_queued", "wait_ms", "peak_wait_ms"}} as of now."""
+        keys = ("requests", "queued", "peak_queued", "wait_ms", "peak_wait_ms")
+        with self._cond:
+            return {group: {k: stats[k] for k in keys} for group, stats in self._stats.items()}
@@ -0,0 +1,171 @@
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+
+from quotes import build_master_mapping_from_holdings, fetch_quotes
+from snapshot import BOOKS, PortfolioSnapshot, snapshot
+from trading_calendar import IST
+
+@dataclass(frozen=True)
+class RefreshState:
+    """
+    One published refresh: the books snapshot plus holdings quotes
+    ({token: (ltp, yclose)}) resolved from it. `version` increases by one
+    per publish, so a page can tell whether anything changed since its
+    last render.
+    """
+    version: int
+    snapshot: PortfolioSnapshot
+    quotes: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    published_at: datetime = None
+    started: float = 0.0  # time.monotonic() when the round began fetching
+
+    @property
+    def age(self):
+        """Seconds since the books were fetched."""
+        return (datetime.now(IST) - self.snapshot.as_of).total_seconds()
+
+    def describe(self):
+        return f"Data as of {self.snapshot.as_of:%H:%M:%S} ({self.age:.0f} s ago), refresh #{self.version}"
+
+class BackgroundRefresher:
+    """
+    Pulls the broker books (and quotes for NSE holdings) on a daemon thread
+    every `interval` seconds and publishes each round as an immutable
+    RefreshState. Pages render from latest() without touching the network;
+    poke() asks for an early round, e.g. right after placing an order.
+
+    Quotes come from quotes.fetch_quotes, so the close cache, calendar and
+    market feed are used the same way the Dashboard used them inline.
+    Outside market hours a token set is quoted once per session.
+    """
+
+    def __init__(self, io, books=tuple(BOOKS), interval=5.0, cache=None, calendar=None, feed=None, quote_workers=None):
+        self.io = io
+        self.books = tuple(books)
+        self.interval = interval
+        self.cache = cache
+        self.calendar = calendar
+        self.feed = feed
+        self.quote_workers = quote_workers
+
+        self.last_error = None
+        self.quote_seconds = None
+        self._state = None
+        self._published = threading.Condition()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopping = False
+        self._listening = False
+        self._closed_quotes = (None, None, None)  # (session, tokens, quotes)
+        self._listeners = []
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return self
+        if hasattr(self.io, "add_invalidation_listener") and not self._listening:
+            # Refetch right after an order/GTT mutation instead of up to `interval` later
+            self.io.add_invalidation_listener(lambda books: self.poke())
+            self._listening = True
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="book-refresher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def poke(self):
+        """Start the next round now instead of waiting out the interval."""
+        self._wake.set()
+
+    def add_listener(self, callback):
+        """Call callback(state) on the refresher thread after every publish."""
+        self._listeners.append(callback)
+        if self._state is not None:
+            callback(self._state)
+
+    def latest(self, wait=None):
+        """The most recent RefreshState; waits up to `wait` seconds for the first one. None if there is none yet."""
+        return self.wait_newer(0, wait) if wait else self._state
+
+    def wait_newer(self, version, timeout=10):
+        """Block until a state newer than `version` is published (or timeout); returns the latest state."""
+        with self._published:
+            self._published.wait_for(lambda: self._state is not None and self._state.version > version, timeout)
+            return self._state
+
+    def refresh_now(self, timeout=10):
+        """
+        Poke and wait for a round that started after this call, so its books
+        reflect anything done before it (a round already in flight may not).
+        Returns the latest state, which is older if the wait times out.
+        """
+        since = time.monotonic()
+        self.poke()
+        with self._published:
+            self._published.wait_for(lambda: self._state is not None and self._state.started >= since, timeout)
+            return self._state
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+            self._wake.wait(self.interval)
+
+    def refresh(self):
+        """Run one round synchronously and publish it."""
+        started = time.monotonic()
+        snap = snapshot(self.io, books=self.books)
+        quotes = {}
+        if "holdings" in snap and snap["holdings"].ok and isinstance(snap["holdings"].data, dict):
+            quotes = self._quotes(snap["holdings"].data)
+        previous = self._state
+        state = RefreshState(
+            version=(previous.version if previous else 0) + 1,
+            snapshot=snap,
+            quotes=MappingProxyType(quotes),
+            published_at=datetime.now(IST),
+            started=started,
+        )
+        # Listeners run first, so whatever they derive is in place before waiters wake
+        for callback in list(self._listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                self.last_error = f"listener {callback!r}: {e}"
+        # A single reference assignment: readers see either the old or the new state
+        with self._published:
+            self._state = state
+            self._published.notify_all()
+        return state
+
+    def _quotes(self, holdings_book):
+        mapping = {k: v for k, v in build_master_mapping_from_holdings(holdings_book).items() if k[0] == "NSE"}
+        market_open = self.calendar is None or self.calendar.is_market_open()
+        if not market_open:
+            # Prices cannot move until the next open; reuse the round that quoted this session
+            session = self.calendar.current_session()
+            tokens = frozenset(v["token"] for v in mapping.values())
+            cached_session, cached_tokens, cached = self._closed_quotes
+            if cached_session == session and cached_tokens == tokens:
+                return cached
+        if market_open and self.feed is not None:
+            self.feed.subscribe((v["segment"], v["token"]) for v in mapping.values())
+        start = time.perf_counter()
+        quotes = fetch_quotes(
+            self.io, mapping, max_workers=self.quote_workers, cache=self.cache,
+            calendar=self.calendar, feed=self.feed if market_open else None,
+        )
+        self.quote_seconds = time.perf_counter() - start
+        if not market_open:
+            self._closed_quotes = (session, tokens, quotes)
+        return quotes
@@ -0,0 +1,199 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bar columns packed into shared memory, one row each
+PACKED_COLUMNS = ("close", "high", "low")
+
+SCAN_COLUMNS = [
+    "Symbol", "Score", "Close", "SMA Fast", "SMA Slow", "RSI", "ATR %",
+    "Breakout High", "From High %", "Trend", "Momentum", "Breakout", "Bars",
+]
+
+@dataclass(frozen=True)
+class ScanSettings:
+    fast: int = 20
+    slow: int = 50
+    rsi: int = 14
+    atr: int = 14
+    breakout: int = 20
+    rsi_floor: float = 50.0
+    rsi_cap: float = 70.0
+
+@dataclass(frozen=True)
+class ScanResult:
+    table: pd.DataFrame
+    symbols: int
+    elapsed: float
+    workers: int
+
+    @property
+    def throughput(self):
+        """Symbols scanned per second."""
+        return self.symbols / self.elapsed if self.elapsed > 0 else float("inf")
+
+# --- Indicators (whole-series, vectorized) ---
+def sma(values, n):
+    """Simple moving average; NaN until `n` values are in."""
+    out = np.full(len(values), np.nan)
+    if len(values) >= n:
+        sums = np.cumsum(np.insert(values, 0, 0.0))
+        out[n - 1:] = (sums[n:] - sums[:-n]) / n
+    return out
+
+def wilder(values, n):
+    """Wilder's smoothing (an EMA with alpha 1/n), as used by RSI and ATR."""
+    return pd.Series(values).ewm(alpha=1 / n, adjust=False, min_periods=n).mean().to_numpy()
+
+def rsi(close, n=14):
+    change = np.diff(close, prepend=np.nan)
+    gain = wilder(np.where(change > 0, change, 0.0)[1:], n)
+    loss = wilder(np.where(change < 0, -change, 0.0)[1:], n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100 - 100 / (1 + gain / loss)
+    out = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), out)
+    return np.insert(np.where(np.isnan(gain), np.nan, out), 0, np.nan)
+
+def atr(high, low, close, n=14):
+    prev = np.insert(close[:-1], 0, np.nan)
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev), np.abs(low - prev)))
+    return wilder(true_range, n)
+
+def prior_high(high, n):
+    """Highest high of the `n` bars before each bar (the breakout level); NaN until available."""
+    out = np.full(len(high), np.nan)
+    if len(high) > n:
+        out[n:] = sliding_window_view(high[:-1], n).max(axis=1)
+    return out
+
+def indicator_row(close, high, low, settings):
+    """Latest indicator values and conditions for one symbol's bars."""
+    last = len(close) - 1
+    row = {"Bars": len(close), "Close": close[last] if len(close) else np.nan}
+    if len(close) <= max(settings.slow, settings.rsi, settings.atr, settings.breakout):
+        return row
+    fast, slow = sma(close, settings.fast)[last], sma(close, settings.slow)[last]
+    level = prior_high(high, settings.breakout)[last]
+    row.update({
+        "SMA Fast": fast,
+        "SMA Slow": slow,
+        "RSI": rsi(close, settings.rsi)[last],
+        "ATR %": atr(high, low, close, settings.atr)[last] / close[last] * 100,
+        "Breakout High": level,
+        "From High %": (close[last] / high.max() - 1) * 100,
+        "Trend": bool(close[last] > slow),
+        "Momentum": bool(fast > slow),
+        "Breakout": bool(close[last] > level),
+    })
+    row["Score"] = (
+        row["Trend"] + row["Momentum"] + row["Breakout"]
+        + bool(settings.rsi_floor <= row["RSI"] <= settings.rsi_cap)
+    )
+    return row
+
+# --- Shared-memory packing ---
+def pack(frames):
+    """
+    Copy every symbol's bars into one shared-memory block: a
+    (len(PACKED_COLUMNS), total bars) float64 matrix with the symbols laid
+    end to end. Returns (block, offsets); symbol i is columns
+    offsets[i]:offsets[i + 1]. The caller closes and unlinks the block.
+    """
+    lengths = [len(frame) for frame in frames]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    shape = (len(PACKED_COLUMNS), max(int(offsets[-1]), 1))
+    block = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 8)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    for frame, start, stop in zip(frames, offsets[:-1], offsets[1:]):
+        for row, name in enumerate(PACKED_COLUMNS):
+            matrix[row, start:stop] = frame[name].to_numpy(np.float64)
+    del matrix
+    return block, offsets
+
+def _scan_block(name, shape, offsets, settings):
+    """Worker task: indicator rows for the symbols spanning `offsets`, read in place from the shared block."""
+    # Spawned workers share the parent's resource tracker, so attaching
+    # does not hand the block's lifetime to them; the parent unlinks it
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        close, high, low = (matrix[PACKED_COLUMNS.index(c)] for c in ("close", "high", "low"))
+        rows = [
+            indicator_row(close[start:stop], high[start:stop], low[start:stop], settings)
+            for start, stop in zip(offsets[:-1], offsets[1:])
+        ]
+        del matrix, close, high, low
+        return rows
+    finally:
+        block.close()
+
+def rank(rows, symbols):
+    """Scan table sorted by Score, then RSI, best first."""
+    table = pd.DataFrame(rows, columns=SCAN_COLUMNS[1:])
+    table.insert(0, "Symbol", list(symbols))
+    table["Score"] = table["Score"].fillna(0).astype(int)
+    table = table.sort_values(["Score", "RSI"], ascending=False, na_position="last", kind="stable")
+    return table.reset_index(drop=True)
+
+class Scanner:
+    """
+    Indicator scan over many symbols' bars on a process pool.
+
+    scan() packs all bars into one shared-memory block and hands each
+    worker a range of symbols by offset only, so the bar arrays are
+    neither pickled nor copied into the workers. The pool is started on
+    first use (spawned, so the parent's threads and sockets are not
+    forked) and reused across scans. With one worker, or fewer symbols
+    than `min_parallel`, the scan runs in-process.
+    """
+
+    def __init__(self, max_workers=None, min_parallel=64):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_parallel = min_parallel
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    def scan(self, frames, settings=None):
+        """
+        Scan {symbol: bar frame} (bar_store.BAR_COLUMNS) and return a
+        ScanResult with the ranked table and the symbols/second achieved.
+        """
+        settings = settings or ScanSettings()
+        symbols = list(frames)
+        start = time.perf_counter()
+        block, offsets = pack([frames[s] for s in symbols])
+        try:
+            shape = (len(PACKED_COLUMNS), max(int(offsets[-1]), 1))
+            workers = 1 if len(symbols) < self.min_parallel else self.max_workers
+            if workers == 1:
+                rows = _scan_block(block.name, shape, offsets, settings)
+            else:
+                # A few tasks per worker evens out symbols with long histories
+                bounds = np.linspace(0, len(symbols), workers * 4 + 1).astype(int)
+                tasks = [
+                    self._executor().submit(_scan_block, block.name, shape, offsets[lo:hi + 1], settings)
+                    for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+                ]
+                rows = [row for task in tasks for row in task.result()]
+        finally:
+            block.close()
+            block.unlink()
+        return ScanResult(rank(rows, symbols), len(symbols), time.perf_counter() - start, workers)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
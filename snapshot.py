@@ -0,0 +1,108 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import MappingProxyType
+
+from trading_calendar import IST
+
+# Book name -> IntegrateOrders method
+BOOKS = {
+    "holdings": "holdings",
+    "positions": "positions",
+    "orders": "orders",
+    "gtt_orders": "gtt_orders",
+    "trades": "trade_book",
+}
+
+# Keys each endpoint has been seen to put its rows under, in order of preference
+ROW_KEYS = {
+    "holdings": ("data",),
+    "positions": ("positions",),
+    "orders": ("orders", "data"),
+    "gtt_orders": ("pendingGTTOrderBook", "gtt_orders", "data"),
+    "trades": ("trades", "data"),
+}
+
+@dataclass(frozen=True)
+class BookFetch:
+    name: str
+    data: dict = None
+    error: str = None
+    fetched_at: datetime = None
+    latency: float = 0.0
+    cached: bool = False
+    # When the request was sent; the broker's state is at least this recent
+    requested_at: datetime = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def result(self):
+        """The payload, or a RuntimeError carrying the fetch error."""
+        if self.error is not None:
+            raise RuntimeError(self.error)
+        return self.data
+
+    @property
+    def rows(self):
+        """Row list of the payload as a tuple; raises like result() if the fetch failed."""
+        if not isinstance(self.result(), dict):
+            return ()
+        for key in ROW_KEYS.get(self.name, ("data",)):
+            value = self.data.get(key)
+            if value:
+                return tuple(value) if isinstance(value, list) else ()
+        return ()
+
+@dataclass(frozen=True)
+class PortfolioSnapshot:
+    """
+    Books fetched together, each stamped with its own fetch time and
+    latency. Treat `data` payloads as read-only; they are shared by every
+    page rendering this snapshot.
+    """
+    books: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    taken_at: datetime = None
+
+    def __getitem__(self, name):
+        return self.books[name]
+
+    def __contains__(self, name):
+        return name in self.books
+
+    @property
+    def latency(self):
+        return max((b.latency for b in self.books.values()), default=0.0)
+
+    @property
+    def as_of(self):
+        """When the oldest book in the snapshot was actually fetched (cache hits can predate taken_at)."""
+        return min((b.fetched_at for b in self.books.values() if b.fetched_at), default=self.taken_at)
+
+def _fetch(io, name):
+    # A caching client (book_cache) reports when its payload was really fetched
+    read_book = getattr(io, "read_book", None)
+    start = time.perf_counter()
+    requested_at = datetime.now(IST)
+    try:
+        if read_book is not None:
+            data, requested_at, fetched_at, latency, cached = read_book(name)
+            return BookFetch(name, data, None, fetched_at, latency, cached, requested_at)
+        data, error = getattr(io, BOOKS[name])(), None
+    except Exception as e:
+        data, error = None, str(e)
+    return BookFetch(name, data, error, datetime.now(IST), time.perf_counter() - start, requested_at=requested_at)
+
+def snapshot(io, books=tuple(BOOKS), max_workers=None):
+    """
+    Fetch the requested books concurrently and return one PortfolioSnapshot.
+    A failing endpoint is recorded in its BookFetch.error instead of raising.
+    """
+    taken_at = datetime.now(IST)
+    if not books:
+        return PortfolioSnapshot(taken_at=taken_at)
+    with ThreadPoolExecutor(max_workers=max_workers or len(books)) as pool:
+        futures = {name: pool.submit(_fetch, io, name) for name in books}
+    return PortfolioSnapshot(MappingProxyType({name: f.result() for name, f in futures.items()}), taken_at)
@@ -0,0 +1,67 @@
+import difflib
+
+import numpy as np
+
+class SymbolSearch:
+    """
+    Autocomplete over an instruments.InstrumentMaster.
+
+    Trading symbols are kept in one sorted byte array per exchange, so a
+    prefix is two np.searchsorted calls (O(log n)) and a slice. When nothing
+    matches the prefix, a difflib fallback ranks the symbols that share the
+    query's first character(s), which keeps typo correction cheap too.
+    """
+
+    # How many prefix hits are ranked before truncating to k
+    RANK_WINDOW = 256
+
+    def __init__(self, master):
+        self.master = master
+        self._sorted = {}
+        segments = master.segment_names[master.segment_codes]
+        for exch in master.segment_names:
+            rows = np.flatnonzero(segments == exch)
+            order = np.argsort(master.tradingsymbol[rows], kind="stable")
+            rows = rows[order]
+            self._sorted[exch] = (master.tradingsymbol[rows], rows)
+
+    def _range(self, exchange, prefix):
+        keys, rows = self._sorted.get(str(exchange).upper(), (None, None))
+        if keys is None or not prefix:
+            return None, None, 0, 0
+        lo = np.searchsorted(keys, prefix, side="left")
+        hi = np.searchsorted(keys, prefix + b"\xff", side="left")
+        return keys, rows, lo, hi
+
+    def complete(self, query, exchange="NSE", k=10):
+        """Top-k tradingsymbols starting with `query`: exact match, then -EQ series, then shortest."""
+        prefix = str(query).strip().upper().encode()
+        keys, _, lo, hi = self._range(exchange, prefix)
+        if hi <= lo:
+            return []
+        window = [s.decode() for s in keys[lo:min(hi, lo + self.RANK_WINDOW)]]
+        q = prefix.decode()
+        window.sort(key=lambda s: (s != q, not s.endswith("-EQ"), len(s), s))
+        return window[:k]
+
+    def fuzzy(self, query, exchange="NSE", k=5, cutoff=0.6):
+        q = str(query).strip().upper()
+        if not q:
+            return []
+        # Narrow to symbols sharing the first two characters, widening to one if that is too thin
+        for width in (2, 1):
+            keys, _, lo, hi = self._range(exchange, q[:width].encode())
+            if hi - lo >= k or width == 1:
+                break
+        candidates = [s.decode() for s in keys[lo:hi]] if keys is not None else []
+        return difflib.get_close_matches(q, candidates, n=k, cutoff=cutoff)
+
+    def suggest(self, query, exchange="NSE", k=10):
+        return self.complete(query, exchange, k) or self.fuzzy(query, exchange, k)
+
+    def validate(self, exchange, tradingsymbol):
+        """Return (instrument, suggestions): the instrument if known, else close alternatives."""
+        inst = self.master.by_symbol(exchange, tradingsymbol)
+        if inst:
+            return inst, []
+        return None, self.suggest(tradingsymbol, exchange, k=5)
@@ -0,0 +1,87 @@
+import csv
+import os
+from datetime import datetime, time, timedelta, timezone
+from functools import lru_cache
+
+IST = timezone(timedelta(hours=5, minutes=30))
+MARKET_OPEN = time(9, 15)
+MARKET_CLOSE = time(15, 30)
+EXCHANGES = ("NSE", "BSE")
+
+DEFAULT_HOLIDAY_FILE = os.environ.get("DEFINEDGE_HOLIDAY_FILE", "holidays.csv")
+
+def _parse_date(text):
+    text = text.strip()
+    for fmt in ("%Y-%m-%d", "%d-%b-%Y", "%d-%m-%Y", "%d/%m/%Y"):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"Unrecognised holiday date: {text!r}")
+
+class TradingCalendar:
+    """
+    NSE/BSE equity sessions: weekdays minus exchange holidays.
+
+    Holiday files are CSV rows of `date[,exchange[,description]]`; a blank
+    exchange applies to both. Dates may be ISO (2026-01-26) or in the
+    exchange circular style (26-Jan-2026). Lines starting with '#' are skipped.
+    """
+
+    def __init__(self, holidays=None):
+        self.holidays = {exch: set() for exch in EXCHANGES}
+        for exch, days in (holidays or {}).items():
+            self.holidays.setdefault(exch, set()).update(days)
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or DEFAULT_HOLIDAY_FILE
+        holidays = {exch: set() for exch in EXCHANGES}
+        if os.path.exists(path):
+            with open(path, newline="") as f:
+                for row in csv.reader(f):
+                    if not row or not row[0].strip() or row[0].lstrip().startswith("#"):
+                        continue
+                    try:
+                        day = _parse_date(row[0])
+                    except ValueError:
+                        # header row
+                        continue
+                    exch = row[1].strip().upper() if len(row) > 1 else ""
+                    for e in ([exch] if exch else EXCHANGES):
+                        holidays.setdefault(e, set()).add(day)
+        return cls(holidays)
+
+    def is_trading_day(self, day, exchange="NSE"):
+        return day.weekday() < 5 and day not in self.holidays.get(exchange, ())
+
+    def previous_session(self, day, exchange="NSE"):
+        day -= timedelta(days=1)
+        while not self.is_trading_day(day, exchange):
+            day -= timedelta(days=1)
+        return day
+
+    def is_market_open(self, now=None, exchange="NSE"):
+        now = now or datetime.now(IST)
+        return self.is_trading_day(now.date(), exchange) and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+    def current_session(self, now=None, exchange="NSE"):
+        """
+        The session whose prices are live (or were last live) at `now`.
+        Before the open, that is still the previous session.
+        """
+        now = now or datetime.now(IST)
+        today = now.date()
+        if self.is_trading_day(today, exchange) and now.time() >= MARKET_OPEN:
+            return today
+        return self.previous_session(today, exchange)
+
+    def last_completed_session(self, now=None, exchange="NSE"):
+        """The most recent session that has closed: today after the close, else the one before."""
+        now = now or datetime.now(IST)
+        session = self.current_session(now, exchange)
+        return self.previous_session(session, exchange) if self.is_market_open(now, exchange) else session
+
+@lru_cache(maxsize=None)
+def default_calendar(path=None):
+    return TradingCalendar.load(path)
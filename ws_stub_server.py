@@ -0,0 +1,71 @@
+"""
+Local stand-in for the broker websocket, for exercising market_feed without
+a live session. Speaks the same touchline protocol (c/ck login, t/tk
+subscribe, tf updates, u unsubscribe, h heartbeat) and random-walks a price
+per subscribed token.
+
+    python ws_stub_server.py --port 8765 --interval 0.5
+
+then point the app at it with `integrate_ws_url = "ws://127.0.0.1:8765"`
+in .streamlit/secrets.toml.
+"""
+import argparse
+import asyncio
+import json
+import random
+
+import websockets
+
+async def serve_client(ws, interval, start_price):
+    prices = {}
+    subscribed = set()
+
+    async def push_updates():
+        while True:
+            await asyncio.sleep(interval)
+            for key in list(subscribed):
+                prices[key] = round(max(0.05, prices[key] * (1 + random.uniform(-0.002, 0.002))), 2)
+                exch, token = key
+                await ws.send(json.dumps({"t": "tf", "e": exch, "tk": token, "lp": f"{prices[key]:.2f}"}))
+
+    pusher = None
+    try:
+        async for raw in ws:
+            msg = json.loads(raw)
+            kind = msg.get("t")
+            if kind == "c":
+                ok = bool(msg.get("susertoken"))
+                await ws.send(json.dumps({"t": "ck", "s": "OK" if ok else "NOT_OK", "uid": msg.get("uid")}))
+                if ok and pusher is None:
+                    pusher = asyncio.ensure_future(push_updates())
+            elif kind == "t":
+                for item in filter(None, msg.get("k", "").split("#")):
+                    exch, token = item.split("|")
+                    key = (exch, token)
+                    prices.setdefault(key, start_price or round(random.uniform(50, 5000), 2))
+                    subscribed.add(key)
+                    close = round(prices[key] * random.uniform(0.97, 1.03), 2)
+                    await ws.send(json.dumps({"t": "tk", "e": exch, "tk": token, "lp": f"{prices[key]:.2f}", "c": f"{close:.2f}"}))
+            elif kind == "u":
+                for item in filter(None, msg.get("k", "").split("#")):
+                    subscribed.discard(tuple(item.split("|")))
+            elif kind == "o":
+                # Order updates: acknowledge only; the stub never has orders
+                await ws.send(json.dumps({"t": "ok"}))
+    finally:
+        if pusher:
+            pusher.cancel()
+
+async def main(host, port, interval, start_price):
+    async with websockets.serve(lambda ws: serve_client(ws, interval, start_price), host, port):
+        print(f"Stub market feed on ws://{host}:{port}")
+        await asyncio.Future()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between price updates")
+    parser.add_argument("--start-price", type=float, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.host, args.port, args.interval, args.start_price))